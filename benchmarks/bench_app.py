@@ -0,0 +1,380 @@
+"""
+Headless benchmark and load test of the app's pages on synthetic logs.
+
+For each ``--sizes`` log (``benchmarks.synthetic``, so the schema and category
+mix match the cleaned log) the pages' work is run without Streamlit against a
+``MemoryBackend`` standing in for the bucket: loading the log, the "Show Me My
+Fish" and "Where Should I Fish?" filters and rollups, their chart specs, the
+clustering fits, the CSV downloads and adding a record.  Each stage reports
+p50/p95 latency over ``--repeat`` runs, peak memory (traced allocations over
+one run) and rows per second.  Then ``--users`` threads rerun a mix of pages
+with random settings for ``--duration`` seconds, the way several people
+clicking around share one server process, for reruns per second and latency
+per page.
+
+Results are compared with ``benchmarks/results.json``: a stage whose p50 is
+more than 20% (and 1 ms) slower than the stored run is flagged, as is a load
+test managing 20% fewer reruns per second, and
+``--check`` exits non-zero if any are.  ``--save`` stores this run as the new
+baseline.  Timings only compare on the same machine.
+
+    python benchmarks/bench_app.py [--sizes 10000 100000] [--repeat 5] [--users 4] [--duration 20] [--save] [--check]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import synthetic_log  # noqa: E402
+from winni.cache import DatasetCache  # noqa: E402
+from winni.cleaning import clean_reports  # noqa: E402
+from winni.clustering import NeighborhoodGraph, fit_kmeans  # noqa: E402
+from winni.exports import ExportCache, export_bytes  # noqa: E402
+from winni.features import FeatureMatrix, FeaturePipeline  # noqa: E402
+from winni.query import FishQuery  # noqa: E402
+from winni.recommend import get_model  # noqa: E402
+from winni.schema import compact  # noqa: E402
+from winni.storage import FishLog, MemoryBackend, migrate  # noqa: E402
+
+RESULTS = os.path.join(os.path.dirname(__file__), 'results.json')
+# the app's typed snapshot, made from a CSV log the way the app does it
+BASE_NAME = 'winni_reports.arrow'
+CSV_NAME = 'winni_reports.csv'
+# a regression is a p50 this much slower than the stored run, and by at least MIN_SLOWER_MS
+TOLERANCE = 0.20
+MIN_SLOWER_MS = 1.0
+# how often each page is opened in the load test
+MIX = {'show_fish': 40, 'where_to_fish': 30, 'clustering': 15, 'download': 10, 'add_fish': 5}
+PAIRS = [['water_temp_f', 'fish_length_in'], ['air_temp_f', 'water_depth_ft']]
+
+try:
+    import altair  # noqa: F401
+    from winni import charts
+except ImportError:
+    # altair is only needed by the app itself
+    charts = None
+
+
+class App:
+    """The pages' work against an in-memory copy of a log, without Streamlit."""
+
+    def __init__(self, df):
+        self.backend = MemoryBackend()
+        self.backend.write(CSV_NAME, (df.to_csv() + '\n').encode('utf-8'))
+        migrate(self.backend, CSV_NAME, BASE_NAME)
+        self.dataset = DatasetCache(FishLog(self.backend, BASE_NAME), prepare=compact)
+        self.pipeline = FeaturePipeline.load()
+        self.model = get_model()
+        self.rng = random.Random(0)
+        self.fits = {}
+        self.exports = ExportCache()
+        self.chart_cache = charts.ChartCache() if charts is not None else None
+
+        # settings people actually pick: common location/weather pairs, a few slider positions
+        common = df.groupby(['location', 'weather']).size().nlargest(12).index
+        self.show_settings = [
+            dict(location=loc, weather=weather, air_temp_f=(70 - spread, 70 + spread), wind_speed_mph=(7 - spread, 7 + spread))
+            for loc, weather in common for spread in (10, 30)
+        ]
+        common = df.groupby(['weather', 'wind_dir']).size().nlargest(12).index
+        self.where_settings = [
+            dict(weather=weather, wind_dir=wind_dir, air_temp_f=(70 - spread, 70 + spread), wind_speed_mph=(7 - spread, 7 + spread))
+            for weather, wind_dir in common for spread in (10, 30)
+        ]
+        self.entries = df.sample(200, random_state=0)
+
+    def load(self):
+        version, df = self.dataset.snapshot()
+        query = self.dataset.derived('query', FishQuery, update=lambda previous, data: previous.extend(data))
+        return version, df, query
+
+    def show_fish(self, filters=None):
+        version, df, query = self.load()
+        filters = filters or self.rng.choice(self.show_settings)
+        weather = query.unique('weather', location=filters['location'])
+        df_weather = query.filter(**filters)
+        share = query.fish_type_share(**filters)
+        months = query.month_counts(**filters)
+        if charts is not None:
+            self.chart_cache.get('fish_type_share', version, filters, lambda: charts.pie_chart(share, 'Fish Caught'))
+            self.chart_cache.get('month_counts', version, filters, lambda: charts.month_chart(months))
+        return len(weather), len(df_weather)
+
+    def where_to_fish(self, filters=None):
+        version, df, query = self.load()
+        filters = filters or self.rng.choice(self.where_settings)
+        df_weather = query.filter(**filters)
+        caught = query.fish_caught(**filters)
+        scores = self.model.score_locations(
+            weather=filters['weather'], wind_dir=filters['wind_dir'], air_temp_f=70, wind_speed_mph=7,
+            water_temp_f=df['water_temp_f'].median(), month=6,
+        )
+        if charts is not None:
+            self.chart_cache.get('days_fished', version, filters, lambda: charts.location_bars(
+                query.days_fished(**filters), '# of Days Fished', 'Days Fished by Location'))
+            self.chart_cache.get('fish_caught', version, filters, lambda: charts.location_bars(
+                caught, '# of Fish Caught', 'Fish Caught by Location'))
+        return len(df_weather), len(scores)
+
+    def clustering(self, pair=None, k=None):
+        version, df, query = self.load()
+        pair = pair if pair is not None else self.rng.randrange(len(PAIRS))
+        k = k or self.rng.randint(2, 5)
+        columns = PAIRS[pair]
+        # the page reuses fits from ClusterService, so only the first visit per version fits
+        key = (version, pair, k)
+        if key not in self.fits:
+            self.fits[key] = fit_kmeans(df[columns].to_numpy(dtype=float), k)
+        result = self.fits[key]
+        cluster_data = df[columns].assign(cluster=result.labels + 1)
+        cluster_data.groupby('cluster').mean()
+        if charts is not None:
+            self.chart_cache.get('kmeans', version, (columns, k, result.inertia), lambda: charts.cluster_scatter(
+                cluster_data[columns[0]], cluster_data[columns[1]], cluster_data['cluster'], columns[0], columns[1],
+                centers=result.centers))
+        return k
+
+    def download(self, filters=None):
+        # both of "Show Me My Fish"'s downloads, shared until the data changes
+        version, df, query = self.load()
+        filters = filters or self.rng.choice(self.show_settings)
+        rows = query.select(**filters)
+        filtered = self.exports.get((version, 'CSV', tuple(sorted(filters.items()))), lambda: export_bytes(df, rows))
+        everything = self.exports.get((version, 'CSV', ()), lambda: export_bytes(df))
+        return len(filtered) + len(everything)
+
+    def add_fish(self):
+        version, df, query = self.load()
+        raw = self.entries.iloc[[self.rng.randrange(len(self.entries))]].drop(columns=['general_loc', 'month'], errors='ignore')
+        record, rejected = clean_reports(raw, reference=df)
+        if len(rejected):
+            raise ValueError(f"sample record rejected: {rejected['reason'].iloc[0]}")
+        self.dataset.fish_log.append(record)
+        self.dataset.invalidate()
+        # the next visit pays for loading the new version and carrying the query over
+        self.load()
+        return len(record)
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(times, rows=None):
+    p50, p95 = np.percentile(times, [50, 95])
+    result = {'p50_ms': round(p50 * 1000, 2), 'p95_ms': round(p95 * 1000, 2)}
+    if rows:
+        result['rows_per_s'] = round(rows / p50)
+    return result
+
+
+def stages(app):
+    """``(name, fn, rows, repeat scale)`` for each stage, in the order the app runs them."""
+    dataset = app.dataset
+    # the compact copy the app shares, not the text log it was written from
+    df = app.load()[1]
+    features = {}
+    graph = {}
+
+    def cold_load():
+        dataset.invalidate()
+        dataset.snapshot()
+
+    def features_scaled():
+        features['X'] = FeatureMatrix(app.pipeline, df).scaled
+
+    def dbscan_graph():
+        graph['graph'] = NeighborhoodGraph(features['X'], max_eps=2.0)
+
+    result = [
+        ('cold load', cold_load, len(df), 1),
+        ('warm load', dataset.snapshot, None, 1),
+        ('query build', lambda: FishQuery(df), len(df), 1),
+        ('show fish', app.show_fish, len(df), 1),
+        ('where to fish', app.where_to_fish, len(df), 1),
+        ('features', features_scaled, len(df), 1),
+        ('kmeans fit', lambda: fit_kmeans(df[PAIRS[0]].to_numpy(dtype=float), 3), len(df), 0.2),
+        ('dbscan graph', dbscan_graph, len(df), 0.2),
+        ('dbscan fit', lambda: graph['graph'].dbscan(0.6, 5), len(df), 0.2),
+        ('csv export', lambda: (export_bytes(df, app.load()[2].select(**app.show_settings[0])), export_bytes(df)), len(df), 1),
+        ('add fish', app.add_fish, 1, 1),
+    ]
+    if charts is not None:
+        version, df, query = app.load()
+        filters = app.show_settings[0]
+        share, months = query.fish_type_share(**filters), query.month_counts(**filters)
+        result.insert(5, ('chart specs', lambda: (charts.pie_chart(share, 'Fish Caught'), charts.month_chart(months)), None, 1))
+    return result
+
+
+def run_stages(app, repeat):
+    results = {}
+    for name, fn, rows, scale in stages(app):
+        times = timed(fn, max(int(repeat * scale), 1))
+        results[name] = dict(summarize(times, rows), peak_mb=round(peak_mb(fn), 1))
+    return results
+
+
+def load_test(app, users, duration):
+    """Reruns per second and per-page latency with ``users`` threads picking pages from ``MIX``."""
+    pages, weights = list(MIX), list(MIX.values())
+    times = {page: [] for page in pages}
+    errors = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def user(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < stop:
+            page = rng.choices(pages, weights)[0]
+            start = time.perf_counter()
+            try:
+                getattr(app, page)()
+            except Exception as e:  # a failing page is a result, not a reason to stop the others
+                errors.append(f'{page}: {e!r}')
+                continue
+            with lock:
+                times[page].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    reruns = sum(len(t) for t in times.values())
+    result = {'users': users, 'reruns_per_s': round(reruns / elapsed, 1), 'errors': len(errors)}
+    result.update({page: dict(summarize(t), reruns=len(t)) for page, t in times.items() if t})
+    return result, errors[:5]
+
+
+def machine():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'date': datetime.date.today().isoformat(),
+    }
+
+
+def compare(baseline, current):
+    """
+    ``(size, stage, stored, now)`` for every stage whose p50 is more than
+    ``TOLERANCE`` slower, and for a load test that managed that much fewer
+    reruns per second.
+    """
+    slower = []
+    for size, stages_ in current.items():
+        stored = baseline.get(size, {})
+        for stage, result in stages_.items():
+            if stage == 'load test':
+                old = stored.get(stage, {}).get('reruns_per_s')
+                new = result['reruns_per_s']
+                if old is not None and new < old / (1 + TOLERANCE):
+                    slower.append((size, 'load test reruns/s', old, new))
+                continue
+            old = stored.get(stage, {}).get('p50_ms')
+            new = result['p50_ms']
+            if old is not None and new > old * (1 + TOLERANCE) and new - old >= MIN_SLOWER_MS:
+                slower.append((size, f'{stage} p50 ms', old, new))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load test per size; 0 skips it')
+    parser.add_argument('--results', default=RESULTS)
+    parser.add_argument('--save', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--check', action='store_true', help='exit 1 if any stage regressed')
+    args = parser.parse_args()
+    # sklearn's notices about upcoming defaults and unsorted DBSCAN graphs
+    warnings.simplefilter('ignore')
+
+    baseline = {}
+    if os.path.exists(args.results):
+        with open(args.results) as f:
+            baseline = json.load(f)
+    if charts is None:
+        print('altair is not installed, leaving out the chart specs\n')
+
+    results = {}
+    for size in args.sizes:
+        df = synthetic_log(size)
+        app = App(df)
+        results[str(size)] = run_stages(app, args.repeat)
+        load = None
+        if args.duration:
+            load, errors = load_test(app, args.users, args.duration)
+            results[str(size)]['load test'] = load
+
+        print(f'{size:,} rows')
+        print(f"{'stage':>16} {'p50 ms':>9} {'p95 ms':>9} {'peak MB':>8} {'rows/s':>12} {'stored p50':>11}")
+        for stage, result in results[str(size)].items():
+            if stage == 'load test':
+                continue
+            stored = baseline.get('results', {}).get(str(size), {}).get(stage, {}).get('p50_ms')
+            rate = f"{result['rows_per_s']:,}" if 'rows_per_s' in result else '-'
+            print(f"{stage:>16} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['peak_mb']:>8.1f} {rate:>12} "
+                  f"{'-' if stored is None else f'{stored:.2f}':>11}")
+        if load:
+            print(f"\n{'load test':>16} {load['users']} users, {load['reruns_per_s']} reruns/s, {load['errors']} errors")
+            for page in MIX:
+                if page in load:
+                    print(f"{page:>16} {load[page]['p50_ms']:>9.2f} {load[page]['p95_ms']:>9.2f} {load[page]['reruns']:>8} reruns")
+            for error in errors:
+                print(f'{"":>16} {error}')
+        print()
+
+    slower = compare(baseline.get('results', {}), results)
+    for size, stage, old, new in slower:
+        print(f'REGRESSION {int(size):,} rows, {stage}: {old:,.2f} -> {new:,.2f}')
+    if baseline and not slower:
+        print(f"no regressions against the run stored on {baseline['machine']['date']}")
+
+    if args.save:
+        with open(args.results, 'w') as f:
+            settings = {key: getattr(args, key) for key in ['sizes', 'repeat', 'users', 'duration']}
+            json.dump({'machine': machine(), 'settings': settings, 'results': results}, f, indent=2)
+            f.write('\n')
+        print(f'saved to {args.results}')
+    if args.check and slower:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
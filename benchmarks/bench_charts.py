@@ -0,0 +1,154 @@
+"""
+Memory growth and time per rerun of the app's charts over many reruns, drawn
+the old way (a new matplotlib pie and 16x9 seaborn scatter per rerun, never
+closed) and through ``winni.charts`` (cached Vega-Lite specs, scatter binned
+past ``MAX_POINTS``).
+
+Each rerun picks a filter setting and a clustering setting from a small pool,
+the way people flip between a few choices, and draws the "Show Me My Fish"
+pie and month chart and the KMeans scatter with Streamlit in bare mode.  The
+charts are marshalled into Streamlit's protos as in the app.  Each layout runs
+in its own process; resident memory is sampled as it goes, and a run stops
+early once it passes ``--limit-mb`` (the old layout can't finish 1,000 reruns
+on a small machine), reporting its growth per rerun.
+
+    python benchmarks/bench_charts.py [--reruns 1000] [--rows 0] [--limit-mb 3000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import SOURCE, synthetic_log  # noqa: E402
+
+CHILD = '''
+import json, os, resource, sys, time, warnings
+warnings.simplefilter('ignore')
+import numpy as np, pandas as pd
+import streamlit as st
+from winni.clustering import fit_kmeans
+from winni.query import FishQuery
+
+layout, reruns, path, limit = sys.argv[1], int(sys.argv[2]), sys.argv[3], float(sys.argv[4])
+df = pd.read_csv(path, index_col=0)
+query = FishQuery(df)
+
+rng = np.random.default_rng(0)
+common = df.groupby(['location', 'weather']).size().nlargest(12).index
+settings = [
+    dict(location=loc, weather=weather, air_temp_f=(70 - spread, 70 + spread), wind_speed_mph=(-23, 37))
+    for loc, weather in common for spread in (20, 30)
+]
+pairs = [['water_temp_f', 'fish_length_in'], ['air_temp_f', 'water_depth_ft']]
+fits = {(i, k): fit_kmeans(df[pair].to_numpy(), k) for i, pair in enumerate(pairs) for k in (2, 3, 4)}
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+if layout == 'before':
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    def draw(filters, pair, k):
+        pie = query.fish_type_share(**filters).to_frame()
+        fig, ax = plt.subplots()
+        ax.pie(pie.iloc[:, 0], labels=pie.index, autopct='%1.1f%%', textprops={'size': 'small'},
+               wedgeprops={'linewidth': 3.0, 'edgecolor': 'white'})
+        plt.title('Fish Caught', fontdict={'fontsize': 8})
+        st.pyplot(fig)
+        st.bar_chart(query.month_counts(**filters).set_index('Month'))
+
+        result = fits[(pair, k)]
+        x, y = pairs[pair]
+        fig, ax = plt.subplots(figsize=(16, 9))
+        ax = sns.scatterplot(ax=ax, x=df[x], y=df[y], hue=result.labels + 1, s=100,
+                             palette=sns.color_palette('colorblind', n_colors=k), legend=True)
+        for ix, (cx, cy) in enumerate(result.centers):
+            ax.scatter(cx, cy, s=200, c='#a8323e')
+            ax.annotate(f'Cluster #{ix + 1}', (cx, cy), fontsize=25, color='#a8323e')
+        st.write(fig)
+
+    figures = lambda: len(plt.get_fignums())
+else:
+    from winni.charts import ChartCache, cluster_scatter, month_chart, pie_chart
+    charts = ChartCache()
+
+    def draw(filters, pair, k):
+        share = query.fish_type_share(**filters)
+        st.vega_lite_chart(charts.get('fish_type_share', 'v', filters, lambda: pie_chart(share, 'Fish Caught')))
+        counts = query.month_counts(**filters)
+        st.vega_lite_chart(charts.get('month_counts', 'v', filters, lambda: month_chart(counts)))
+
+        result = fits[(pair, k)]
+        x, y = pairs[pair]
+        st.vega_lite_chart(charts.get('kmeans', 'v', (pairs[pair], k), lambda: cluster_scatter(
+            df[x], df[y], result.labels + 1, x, y, centers=result.centers)))
+
+    figures = lambda: 0
+
+samples = []
+warm = None
+done = 0
+start = time.perf_counter()
+for i in range(reruns):
+    draw(settings[rng.integers(len(settings))], int(rng.integers(len(pairs))), int(rng.integers(2, 5)))
+    done += 1
+    if i == 9:
+        warm = rss_mb()
+    if (i + 1) % max(reruns // 10, 1) == 0:
+        samples.append(round(rss_mb(), 1))
+    if rss_mb() > limit:
+        break
+elapsed = time.perf_counter() - start
+print(json.dumps(dict(
+    reruns=done,
+    seconds=elapsed / done,
+    warm=warm,
+    final=rss_mb(),
+    peak=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    figures=figures(),
+    samples=samples,
+)))
+'''
+
+
+def run(layout, reruns, path, limit):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run([sys.executable, '-c', CHILD, layout, str(reruns), path, str(limit)], env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f'{layout} failed:\n{proc.stderr}')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--reruns', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=0, help='synthetic log size; 0 uses the real log')
+    parser.add_argument('--limit-mb', type=float, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        path = SOURCE
+        if args.rows:
+            path = os.path.join(root, 'reports.csv')
+            synthetic_log(args.rows).to_csv(path)
+
+        print(f"{'layout':>7} {'reruns':>7} {'ms/rerun':>9} {'RSS@10 MB':>10} {'RSS end MB':>11} {'MB/rerun':>9} "
+              f"{f'growth@{args.reruns}':>12} {'open figs':>10}")
+        for layout in ['before', 'after']:
+            result = run(layout, args.reruns, path, args.limit_mb)
+            per_rerun = (result['final'] - result['warm']) / max(result['reruns'] - 10, 1)
+            print(f"{layout:>7} {result['reruns']:>7} {result['seconds'] * 1000:>9.1f} {result['warm']:>10.0f} "
+                  f"{result['final']:>11.0f} {per_rerun:>9.3f} {per_rerun * (args.reruns - 10):>12.0f} {result['figures']:>10}")
+            print(f"{'':>7} RSS every {args.reruns // 10} reruns: {result['samples']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Compare the per-row cleaning cells of ``data_cleaning.ipynb`` (Python
+``.map`` calls and ``pd.to_datetime`` on every time string) with
+``winni.cleaning`` on a synthetic raw notebook file, for time and peak traced
+memory (tracemalloc, measured in a second run).  ``clean_file`` reads the
+file in chunks, so its peak stays flat as the file grows.
+
+    python benchmarks/bench_cleaning.py [--rows 1000000] [--chunksize 100000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import synthetic_reports  # noqa: E402
+from winni.cleaning import clean_file, clean_reports  # noqa: E402
+
+
+# the notebook's cells, as they are written there
+def rough_location(col):
+    name_list = []
+    directions = ['east', 'west', 'north', 'south', 'of']
+
+    for i in col.split():
+        if i not in directions:
+            name_list.append(i)
+    return ' '.join(name_list)
+
+
+def change_fish_type(fish):
+    if fish == 'small mouth bass':
+        return 'smallmouth'
+    elif fish == 'salmon ':
+        return 'salmon'
+    elif fish == 'lake trout ':
+        return 'lake trout'
+    return fish
+
+
+def change_weather(condition):
+    if condition == 'calm' or condition == 'partly sunny' or condition == 'slight wind':
+        return 'sunny'
+    elif condition == 'rainy':
+        return 'raining'
+    elif condition == 'cloudy':
+        return 'overcast'
+    return condition
+
+
+def notebook_clean(path):
+    df = pd.read_csv(path)
+    df['location2'] = df['location'].map(lambda x: rough_location(x))
+    df['date'] = pd.to_datetime(df['date'])
+    df['fish_type'] = df['fish_type'].map(change_fish_type)
+    df = df.drop(columns='thermocline_depth_ft')
+    df['weather'] = df['weather'].map(change_weather)
+    df['time2'] = pd.to_datetime(df['time'])
+    df['duration'] = pd.to_datetime(df['duration'])
+    df['minutes'] = df['duration'].dt.hour * 60 + df['duration'].dt.minute + df['duration'].dt.second / 60
+    df.drop(columns='duration', inplace=True)
+    df['month'] = df['date'].dt.month
+    for col, by in [('air_temp_f', 'month'), ('water_temp_f', 'month'), ('fish_length_in', 'fish_type')]:
+        df[col] = df[col].fillna(df[by].map(df.groupby(by)[col].mean().to_dict()))
+    df['wind_dir'] = df['wind_dir'].fillna('no_wind')
+    df['skunked'] = df['skunked'].fillna(False)
+    df['weather'] = df['weather'].fillna('no_weather_recorded')
+    df['time'] = df['time'].fillna('no_time_recorded')
+    df['fish_type'] = df['fish_type'].fillna('no_fish_caught')
+    df = df.rename(columns={'minutes': 'duration_min', 'location2': 'general_loc', 'time': 'time_caught'})
+    df = df.drop(columns='time2')
+    df['hour'] = df['time_caught'].map(lambda x: re.search(r'.*(?=:)', x)[0] if x != 'no_time_recorded' else 0).astype(int)
+    water_depth_dict = df.groupby('fish_type')['water_depth_ft'].mean().to_dict()
+    df['water_depth_ft'] = df['water_depth_ft'].fillna(df['fish_type'].map(water_depth_dict)).fillna(0)
+    df['fish_length_in'] = df['fish_length_in'].fillna(0)
+    return np.round(df, decimals=1)
+
+
+def measure(fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'reports.csv')
+        synthetic_reports(args.rows).to_csv(path, index=False)
+
+        runs = [
+            ('notebook cells', lambda: notebook_clean(path)),
+            ('clean_reports', lambda: clean_reports(pd.read_csv(path))),
+            ('clean_file', lambda: sum(len(rows) for rows, _ in clean_file(path, chunksize=args.chunksize))),
+        ]
+        print(f"{'rows':>9} {'method':>15} {'seconds':>9} {'rows/sec':>10} {'peak MB':>9}")
+        for name, fn in runs:
+            with warnings.catch_warnings():
+                # pd.to_datetime's per-element parsing warning, from the notebook cells
+                warnings.simplefilter('ignore', UserWarning)
+                elapsed, peak = measure(fn)
+            print(f'{args.rows:>9} {name:>15} {elapsed:>9.2f} {args.rows / elapsed:>10,.0f} {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the page's direct ``DBSCAN(eps, min_samples).fit(X_scaled)`` call
+against DBSCAN on a precomputed ``NeighborhoodGraph``, for time and peak
+traced memory (tracemalloc, measured in a second run), on synthetic logs.
+
+The direct fit is skipped above ``--direct-limit`` rows, where it takes too
+long to be worth waiting for.  When both run, the adjusted Rand index shows
+how closely the graph labels agree (1.0 = identical clustering), next to
+the share of rows each leaves as noise.  A small ``--max-points`` checks the
+sampled graph against the direct fit where each sampled point stands for
+more than ``min_samples`` rows, without waiting on a large direct fit:
+
+    python benchmarks/bench_dbscan.py [--rows 10000 100000 1000000]
+    python benchmarks/bench_dbscan.py --rows 20000 --max-points 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from sklearn.cluster import DBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import synthetic_log  # noqa: E402
+from winni.clustering import DBSCAN_GRID, NeighborhoodGraph  # noqa: E402
+from winni.features import FeatureMatrix, FeaturePipeline  # noqa: E402
+
+EPS, MIN_SAMPLES = 0.6, 5
+
+
+def measure(fn, memory=True):
+    # timed untraced: tracemalloc slows the many small per-row allocations
+    # in DBSCAN's neighborhood lists far more than the large arrays
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    if not memory:
+        return result, elapsed, float('nan')
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--direct-limit', type=int, default=100_000)
+    parser.add_argument('--max-points', type=int, default=20000)
+    args = parser.parse_args()
+
+    pipeline = FeaturePipeline.load()
+    print(f"{'rows':>9} {'method':>18} {'seconds':>9} {'peak MB':>9} {'noise':>6} {'ARI':>6}")
+    for rows in args.rows:
+        X = FeatureMatrix(pipeline, synthetic_log(rows)).scaled
+
+        direct = None
+        if rows <= args.direct_limit:
+            direct, elapsed, peak = measure(lambda: DBSCAN(eps=EPS, min_samples=MIN_SAMPLES).fit(X).labels_)
+            print(f'{rows:>9} {"direct fit":>18} {elapsed:>9.2f} {peak:>9.1f} {(direct == -1).mean():>6.1%} {"":>6}')
+
+        graph, elapsed, peak = measure(lambda: NeighborhoodGraph(X, max_points=args.max_points))
+        mode = 'approx' if graph.approximate else 'exact'
+        print(f'{rows:>9} {"graph build " + mode:>18} {elapsed:>9.2f} {peak:>9.1f} {"":>6} {"":>6}')
+
+        labels, elapsed, peak = measure(lambda: graph.dbscan(EPS, MIN_SAMPLES))
+        ari = f'{adjusted_rand_score(direct, labels):.3f}' if direct is not None else ''
+        print(f'{rows:>9} {"graph fit":>18} {elapsed:>9.2f} {peak:>9.1f} {(labels == -1).mean():>6.1%} {ari:>6}')
+
+        _, elapsed, peak = measure(lambda: [graph.dbscan(**params) for params in DBSCAN_GRID], memory=False)
+        print(f'{rows:>9} {f"graph grid ({len(DBSCAN_GRID)})":>18} {elapsed:>9.2f} {peak:>9.1f} {"":>6} {"":>6}')
+
+
+if __name__ == '__main__':
+    main()
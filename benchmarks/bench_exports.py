@@ -0,0 +1,86 @@
+"""
+Time and peak memory of the "Show Me My Fish" downloads, built on every rerun
+as the page used to (``df.to_csv().encode()`` for the filtered and the full
+table) against ``winni.exports`` (nothing until asked, built in chunks,
+then cached).
+
+Peak memory is what ``tracemalloc`` sees allocated during the step, on top of
+the log itself, measured on a second run since tracing slows ``to_csv`` down
+many times over.  Also checks the chunked CSV is byte for byte the old one.
+
+    python benchmarks/bench_exports.py [--rows 200000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import synthetic_log  # noqa: E402
+from winni.exports import ExportCache, export_bytes  # noqa: E402
+from winni.query import FishQuery  # noqa: E402
+
+
+def measure(fn, reset):
+    reset()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+
+    reset()
+    tracemalloc.start()
+    try:
+        fn()
+        return seconds, tracemalloc.get_traced_memory()[1] / 2**20, result
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    df = synthetic_log(args.rows)
+    query = FishQuery(df)
+    location, weather = df.groupby(['location', 'weather']).size().idxmax()
+    filters = dict(location=location, weather=weather, air_temp_f=(40, 100), wind_speed_mph=(-23, 37))
+    rows = query.select(**filters)
+    print(f'{len(df):,} rows, {len(rows):,} matching the filters\n')
+
+    def before():
+        return df.iloc[rows].to_csv().encode('utf-8'), df.to_csv().encode('utf-8')
+
+    exports = ExportCache()
+    # each step is run twice, so the first-download steps start from an empty cache both times
+    empty = {'after: first download, CSV', 'after: first download, Parquet'}
+
+    def after(file_format='CSV'):
+        return (
+            exports.get(('v', file_format, 'filtered'), lambda: export_bytes(df, rows, file_format)),
+            exports.get(('v', file_format, 'all'), lambda: export_bytes(df, None, file_format)),
+        )
+
+    print(f"{'step':>36} {'seconds':>8} {'peak MB':>8} {'file MB':>8}")
+    steps = [
+        ('before: every rerun', before),
+        ('after: rerun, nothing requested', lambda: None),
+        ('after: first download, CSV', after),
+        ('after: repeat download, CSV', after),
+        ('after: first download, Parquet', lambda: after('Parquet')),
+    ]
+    files = {}
+    for label, fn in steps:
+        seconds, peak, result = measure(fn, (lambda: exports.__init__()) if label in empty else (lambda: None))
+        size = sum(len(data) for data in result) / 2**20 if result else 0
+        files[label] = result
+        print(f'{label:>36} {seconds:>8.2f} {peak:>8.0f} {size:>8.1f}')
+
+    assert files['before: every rerun'] == files['after: first download, CSV']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Bulk import throughput: synthetic notebook files in the raw
+``Winni Reports.csv`` layout are imported into a fishing log on local disk,
+reporting the time to read, clean and write them and the rows per second.
+
+    python benchmarks/bench_ingest.py [--rows 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import SOURCE, synthetic_reports  # noqa: E402
+from winni.cleaning import clean_reports  # noqa: E402
+from winni.ingest import import_reports  # noqa: E402
+from winni.storage import FishLog, LocalBackend  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    reference = pd.read_csv(SOURCE, index_col=0)
+    print(f"{'rows':>9} {'read s':>8} {'clean s':>8} {'total s':>8} {'rows/sec':>10} {'segments':>9}")
+    with tempfile.TemporaryDirectory() as root:
+        for rows in args.rows:
+            path = os.path.join(root, f'reports-{rows}.csv')
+            synthetic_reports(rows).to_csv(path, index=False)
+
+            backend = LocalBackend(os.path.join(root, f'log-{rows}'))
+            fish_log = FishLog(backend, 'winni_reports.csv')
+            backend.write(fish_log.base_name, (reference.to_csv() + '\n').encode('utf-8'))
+
+            # the stages on their own, then the whole import as the app runs it
+            start = time.perf_counter()
+            raw = pd.read_csv(path)
+            read = time.perf_counter() - start
+            start = time.perf_counter()
+            clean_reports(raw, reference)
+            clean = time.perf_counter() - start
+
+            result = import_reports(fish_log, path, reference)
+            assert result.rows + len(result.rejected) == rows
+            print(f'{rows:>9} {read:>8.2f} {clean:>8.2f} {result.seconds:>8.2f} '
+                  f'{rows / result.seconds:>10,.0f} {len(fish_log.segments()):>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Import time and first paint for each page of the app, before and after the
+split into ``winni.pages``.
+
+Each page is run in a fresh interpreter with Streamlit in bare mode against a
+local copy of the log (``WINNI_DATA_DIR``), so nothing goes to the bucket.
+"before" first imports everything the single-file ``winni_st.py`` imported at
+the top (what every cold start and page paid), "after" imports only the
+page's module.  First paint is the time from the start of the imports until
+the page's ``main()`` returns; rerun is a second ``main()`` in the same
+process, as Streamlit does on each interaction.
+
+    python benchmarks/bench_pages.py [--rows 0] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import SOURCE, synthetic_log  # noqa: E402
+from winni.pages import PAGES  # noqa: E402
+
+# the imports at the top of winni_st.py before the split
+MONOLITH = [
+    'streamlit', 'streamlit_option_menu', 'pandas', 'numpy', 'matplotlib.pyplot', 'seaborn', 'altair',
+    'tableauserverclient', 'streamlit.components.v1', 'google.cloud.storage', 'google.oauth2.service_account',
+    'winni.cache', 'winni.cleaning', 'winni.clustering', 'winni.features', 'winni.ingest', 'winni.query',
+    'winni.recommend', 'winni.storage',
+]
+# libraries worth knowing whether a page pulled in, beyond what streamlit imports
+HEAVY = ['matplotlib', 'seaborn', 'altair', 'sklearn', 'google.cloud.storage', 'tableauserverclient']
+
+CHILD = '''
+import importlib, json, resource, sys, time, warnings
+warnings.simplefilter('ignore')
+start = time.perf_counter()
+import streamlit
+# streamlit itself brings in some plotting libraries; only count what comes after
+baseline = set(sys.modules)
+missing = []
+for name in {preload!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        missing.append(name)
+page = importlib.import_module('winni.pages.{module}')
+imported = time.perf_counter()
+page.main()
+painted = time.perf_counter()
+page.main()
+rerun = time.perf_counter() - painted
+print(json.dumps(dict(
+    imports=imported - start,
+    first_paint=painted - start,
+    rerun=rerun,
+    rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    heavy=[name for name in {heavy!r} if name in sys.modules and name not in baseline],
+    missing=missing,
+)))
+'''
+
+
+def run_page(module, preload, data_dir):
+    env = dict(os.environ, WINNI_DATA_DIR=data_dir, PYTHONPATH=ROOT)
+    code = CHILD.format(preload=preload, module=module, heavy=HEAVY)
+    proc = subprocess.run([sys.executable, '-c', code], env=env, cwd=data_dir, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f'{module} failed:\n{proc.stderr}')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def best(runs, key):
+    return min(run[key] for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=0, help='synthetic log size; 0 uses the real log')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        target = os.path.join(data_dir, 'winni_reports.csv')
+        if args.rows:
+            synthetic_log(args.rows).to_csv(target)
+        else:
+            shutil.copy(SOURCE, target)
+
+        missing = set()
+        print(f"{'page':>26} {'layout':>7} {'import s':>9} {'paint s':>8} {'rerun s':>8} {'RSS MB':>7}  libraries loaded")
+        for label, module in PAGES.items():
+            for layout, preload in [('before', MONOLITH), ('after', [])]:
+                runs = [run_page(module, preload, data_dir) for _ in range(args.repeat)]
+                missing.update(runs[0]['missing'])
+                loaded = ', '.join(runs[0]['heavy']) or '-'
+                print(f"{label:>26} {layout:>7} {best(runs, 'imports'):>9.2f} {best(runs, 'first_paint'):>8.2f} "
+                      f"{best(runs, 'rerun'):>8.3f} {best(runs, 'rss_mb'):>7.0f}  {loaded}")
+        if missing:
+            print(f"\nnot installed, left out of 'before': {', '.join(sorted(missing))}")
+
+
+if __name__ == '__main__':
+    main()
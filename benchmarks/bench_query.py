@@ -0,0 +1,91 @@
+"""
+Time the "Show Me My Fish" / "Where Should I Fish?" queries with pandas masks
+against ``FishQuery`` on a synthetic log, and check both give the same answer.
+Also times carrying ``FishQuery`` over to the next version of the log after an
+append, against building it from scratch.
+
+    python benchmarks/bench_query.py [--rows 2000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import synthetic_log  # noqa: E402
+from winni.query import FishQuery  # noqa: E402
+
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def pandas_show_me(df, location, weather, temp, wind):
+    df_location = df[df['location'] == location]
+    df_weather = df_location[(df_location['weather'] == weather) & (df_location['wind_speed_mph'].between(*wind)) & (df_location['air_temp_f'].between(*temp))]
+    pie = df_weather.groupby(['fish_type']).size().sort_values(ascending=False)
+    a = df_weather.groupby('month')['skunked'].sum().reset_index()
+    b = df_weather.groupby('month')['date'].count().reset_index()
+    return df_weather, pie / pie.sum(), pd.merge(b, a, on='month')
+
+
+def pandas_where(df, weather, wind_dir, temp, wind):
+    df_weather = df.loc[(df['weather'] == weather) & (df['wind_speed_mph'].between(*wind)) & (df['air_temp_f'].between(*temp)) & (df['wind_dir'] == wind_dir)]
+    days = df_weather.groupby(['location', 'date']).count().groupby('location').count()['month']
+    caught = df_weather.loc[(df_weather['fish_type'] != 'no_fish_caught')].groupby('location')['fish_type'].count()
+    return df_weather, days.sort_values(ascending=False), caught.sort_values(ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    df = synthetic_log(args.rows)
+    start = time.perf_counter()
+    query = FishQuery(df)
+    print(f'{len(df)} rows, {len(query.trips)} trips, built in {time.perf_counter() - start:.2f}s')
+
+    # the next version after an "Add Fish" submission and after a bulk import
+    for added in [1, args.rows // 100]:
+        previous = FishQuery(df.iloc[:-added])
+        ms, extended = best_of(lambda: previous.extend(df), repeat=3)
+        print(f'{added:>8} rows appended: extend {ms:9.1f} ms')
+        assert extended.trip_summary.table.equals(query.trip_summary.table)
+        assert extended.trip_summary.types.equals(query.trip_summary.types)
+
+    show_me = dict(location='north of diamond', weather='sunny', air_temp_f=(55, 75), wind_speed_mph=(0, 10))
+    where = dict(weather='sunny', wind_dir='nw', air_temp_f=(40, 100), wind_speed_mph=(0, 37))
+
+    ms, (rows, pie, month) = best_of(lambda: pandas_show_me(df, 'north of diamond', 'sunny', (55, 75), (0, 10)))
+    print(f'Show Me My Fish   pandas      : {ms:8.3f} ms')
+    ms, _ = best_of(lambda: query.select(**show_me))
+    print(f'Show Me My Fish   index rows  : {ms:8.3f} ms')
+    ms, _ = best_of(lambda: (query.fish_type_share(**show_me), query.month_counts(**show_me)))
+    print(f'Show Me My Fish   index charts: {ms:8.3f} ms')
+    assert rows.equals(query.filter(**show_me))
+    assert pie.round(12).tolist() == query.fish_type_share(**show_me).round(12).tolist()
+    assert month.values.tolist() == query.month_counts(**show_me).values.tolist()
+
+    ms, (rows, days, caught) = best_of(lambda: pandas_where(df, 'sunny', 'nw', (40, 100), (0, 37)))
+    print(f'Where Should I Fish pandas      : {ms:8.3f} ms')
+    ms, _ = best_of(lambda: query.select(**where))
+    print(f'Where Should I Fish index rows  : {ms:8.3f} ms')
+    ms, _ = best_of(lambda: (query.days_fished(**where), query.fish_caught(**where)))
+    print(f'Where Should I Fish index charts: {ms:8.3f} ms')
+    assert rows.equals(query.filter(**where))
+    assert days.tolist() == query.days_fished(**where)['# of Days Fished'].tolist()
+    assert caught.tolist() == query.fish_caught(**where)['# of Fish Caught'].tolist()
+
+
+if __name__ == '__main__':
+    main()
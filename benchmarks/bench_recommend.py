@@ -0,0 +1,95 @@
+"""
+Compare the pickled sklearn classifier with the exported ``SkunkModel``:
+load time and peak traced memory (tracemalloc, measured in a second run),
+and p50/p99 latency of scoring every area for one set of conditions.
+
+The pickle is the freshly trained ``(pipeline, scaler, pca, ada)`` tuple,
+since ``finalized_model.sav`` doesn't carry its preprocessing steps.
+
+    python benchmarks/bench_recommend.py [--calls 1000]
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from winni.recommend import MODEL_PATH, SkunkModel, _poly2, export_model, train_model  # noqa: E402
+from winni.snapshot import read_snapshot  # noqa: E402
+
+SNAPSHOT = os.path.join(os.path.dirname(MODEL_PATH), 'winni_reports.arrow')
+
+
+def measure(fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def latencies(fn, conditions):
+    times = []
+    for condition in conditions:
+        start = time.perf_counter()
+        fn(condition)
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, [50, 99]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--calls', type=int, default=1000)
+    args = parser.parse_args()
+
+    df = read_snapshot(SNAPSHOT)
+    fitted = train_model(df)
+    pipeline, scaler, pca, ada = fitted
+    path = MODEL_PATH.replace('.npz', '.bench.npz')
+    export_model(*fitted, path=path)
+    blob = pickle.dumps(fitted)
+
+    print(f"{'method':>10} {'size MB':>9} {'load ms':>9} {'peak MB':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    rng = np.random.default_rng(0)
+    vocabulary = pipeline.vocabulary
+    conditions = [
+        dict(
+            weather=rng.choice(vocabulary['weather']),
+            wind_dir=rng.choice(vocabulary['wind_dir']),
+            air_temp_f=int(rng.integers(35, 91)),
+            wind_speed_mph=int(rng.integers(0, 21)),
+            water_temp_f=float(rng.normal(70, 4)),
+            month=int(rng.integers(5, 11)),
+        )
+        for _ in range(args.calls)
+    ]
+
+    def sklearn_score(condition):
+        frame = pd.DataFrame(dict(condition, general_loc=vocabulary['general_loc']))
+        Z = pca.transform(scaler.transform(_poly2(pipeline.encode(frame).astype(np.float64))))
+        return ada.predict_proba(Z)[:, 1]
+
+    elapsed, peak = measure(lambda: pickle.loads(blob))
+    p50, p99 = latencies(sklearn_score, conditions[:max(args.calls // 10, 1)])
+    print(f'{"pickle":>10} {len(blob) / 2**20:>9.2f} {elapsed * 1000:>9.1f} {peak:>9.1f} {p50:>9.2f} {p99:>9.2f}')
+
+    elapsed, peak = measure(lambda: SkunkModel.load(path))
+    model = SkunkModel.load(path)
+    p50, p99 = latencies(lambda condition: model.score_locations(**condition), conditions)
+    print(f'{"export":>10} {os.path.getsize(path) / 2**20:>9.2f} {elapsed * 1000:>9.1f} {peak:>9.1f} {p50:>9.2f} {p99:>9.2f}')
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
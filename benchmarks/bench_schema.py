@@ -0,0 +1,99 @@
+"""
+Memory and speed of the fishing log as parsed from CSV (text categories,
+dates and times, 64-bit numbers) against the compact layout the app now
+shares between sessions (``winni.schema.compact``).
+
+Reports the frame's memory scaled to 1M rows, the one-off cost of compacting
+each new version, the clustering page's per-rerun copy, and p50 timings of
+the filters and groupbys the pages and notebooks run on the log.  Also checks
+both layouts give the same answers.
+
+    python benchmarks/bench_schema.py [--rows 1000000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import synthetic_log  # noqa: E402
+from winni.query import FishQuery  # noqa: E402
+from winni.schema import TIME_COLUMNS, compact  # noqa: E402
+from winni.trips import TripSummary  # noqa: E402
+
+
+def p50(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return np.median(times), result
+
+
+def mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def operations(df):
+    location, weather = df.groupby(['location', 'weather'], observed=True).size().idxmax()
+    numeric = [col for col in df.select_dtypes(include=np.number).columns if col not in TIME_COLUMNS] + ['skunked']
+    return [
+        ('equality + range filter', lambda: df[
+            (df['location'] == location) & (df['weather'] == weather)
+            & df['air_temp_f'].between(50, 80) & df['wind_speed_mph'].between(0, 10)]),
+        ('date range filter', lambda: df[pd.to_datetime(df['date']).dt.month.isin([6, 7])]),
+        ('fish per type', lambda: df['fish_type'].value_counts()),
+        ('mean length by area, month', lambda: df.groupby(['general_loc', 'month'], observed=True)['fish_length_in'].mean()),
+        ('skunks by location', lambda: df.groupby('location', observed=True)['skunked'].sum()),
+        ('clustering page copy', lambda: df[numeric].copy()),
+        ('query build', lambda: FishQuery(df)),
+        ('trip summary', lambda: TripSummary(df)),
+    ]
+
+
+def same(a, b):
+    if isinstance(a, pd.Series):
+        return len(a) == len(b) and np.allclose(np.sort(a.to_numpy(dtype=float)), np.sort(b.to_numpy(dtype=float)), rtol=1e-5)
+    if isinstance(a, pd.DataFrame):
+        return a.index.equals(b.index)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')
+
+    # what FishLog.load gives for a CSV log
+    text = synthetic_log(args.rows)
+    seconds, small = p50(lambda: compact(text), 1)
+    scale = 1_000_000 / len(text)
+
+    print(f'{len(text):,} rows; memory per 1M rows')
+    print(f"{'column':>16} {'before':>10} {'after':>10} {'MB before':>10} {'MB after':>9}")
+    for col in text.columns:
+        print(f"{col:>16} {str(text[col].dtype):>10} {str(small[col].dtype)[:10]:>10} "
+              f"{text[col].memory_usage(deep=True, index=False) / 2**20 * scale:>10.1f} "
+              f"{small[col].memory_usage(deep=True, index=False) / 2**20 * scale:>9.1f}")
+    print(f"{'total':>16} {'':>10} {'':>10} {mb(text) * scale:>10.1f} {mb(small) * scale:>9.1f}")
+    print(f'\ncompacting a new version: {seconds:.2f}s, once per version for every session\n')
+
+    print(f"{'operation':>28} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+    for (label, before), (_, after) in zip(operations(text), operations(small)):
+        old, old_result = p50(before, args.repeat)
+        new, new_result = p50(after, args.repeat)
+        assert same(old_result, new_result), label
+        print(f'{label:>28} {old * 1000:>10.1f} {new * 1000:>9.1f} {old / new:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare loading the fishing log from CSV against the typed Arrow snapshot.
+
+The cleaned log is repeated 10x, 100x and 1000x, written in both formats, and
+each file is loaded in a fresh process so resident memory isn't shared between
+runs.
+
+    python benchmarks/bench_snapshot.py [--scales 10 100 1000]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from winni.snapshot import read_snapshot, write_snapshot  # noqa: E402
+
+SOURCE = os.path.join(os.path.dirname(__file__), '..', 'model_data', 'winni_reports.csv')
+
+
+def _load(fmt, path, queue):
+    # ru_maxrss is in KB on Linux
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if fmt == 'csv':
+        df = pd.read_csv(path, index_col=0)
+    else:
+        df = read_snapshot(path)
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (after - before) / 1024, df.memory_usage(deep=True).sum() / 2**20))
+
+
+def measure(fmt, path):
+    ctx = get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_load, args=(fmt, path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    base = pd.read_csv(SOURCE, index_col=0)
+    print(f"{'rows':>10} {'format':>7} {'file MB':>8} {'load s':>8} {'rss MB':>8} {'frame MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            df = pd.concat([base] * scale, ignore_index=True)
+            csv_path = os.path.join(tmp, f'log_{scale}.csv')
+            arrow_path = os.path.join(tmp, f'log_{scale}.arrow')
+            df.to_csv(csv_path)
+            write_snapshot(df, arrow_path)
+
+            for fmt, path in [('csv', csv_path), ('arrow', arrow_path)]:
+                elapsed, rss, frame = measure(fmt, path)
+                size = os.path.getsize(path) / 2**20
+                print(f'{len(df):>10} {fmt:>7} {size:>8.1f} {elapsed:>8.3f} {rss:>8.1f} {frame:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
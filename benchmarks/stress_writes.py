@@ -0,0 +1,117 @@
+"""
+Many "Add Fish" users writing at once: check that no record is lost or
+written twice.
+
+``--threads`` users per app instance each add ``--records`` records, one at a
+time with a short random pause, to a fishing log in a temporary folder.
+"overwrite" is what "Add Fish" used to do: download the whole log, add the
+row and upload it again, so users that overlap write over each other.
+"coordinator" runs ``--instances`` app instances on the same folder (as
+several servers on one bucket would be), each sending its users' records
+through its own ``WriteCoordinator``.  Compaction is set to run every few
+segments, so the instances also fold segments into the base at the same
+time, relying on the storage's generation checks.  Afterwards, the log is read
+back and every record is checked to appear exactly once.  The command exits 1
+if any record is lost or duplicated in "coordinator" mode.
+
+    python benchmarks/stress_writes.py [--threads 16] [--records 50] [--instances 2] [--compact-every 5]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from winni.storage import FishLog, LocalBackend  # noqa: E402
+from winni.writes import WriteCoordinator  # noqa: E402
+
+BASE_NAME = 'winni_reports.csv'
+
+
+def overwrite(backend, user, seq):
+    # the old "Add Fish": read everything, add a row, write everything back
+    df = pd.read_csv(io.BytesIO(backend.read(BASE_NAME)), index_col=0)
+    df.loc[len(df.index)] = [user, seq]
+    backend.write(BASE_NAME, (df.to_csv() + '\n').encode('utf-8'))
+
+
+def run(mode, root, args):
+    backend = LocalBackend(root)
+    backend.write(BASE_NAME, (pd.DataFrame({'user': [-1], 'seq': [-1]}).to_csv() + '\n').encode('utf-8'))
+    coordinators = [
+        WriteCoordinator(FishLog(LocalBackend(root), BASE_NAME, compact_every=args.compact_every), window=args.window)
+        for _ in range(args.instances)
+    ]
+    users = args.threads * args.instances
+    errors = []
+
+    def user(i):
+        rng = random.Random(i)
+        for seq in range(args.records):
+            time.sleep(rng.uniform(0, args.pause))
+            try:
+                if mode == 'overwrite':
+                    overwrite(backend, i, seq)
+                else:
+                    coordinators[i % args.instances].append([{'user': i, 'seq': seq}])
+            except Exception as e:
+                errors.append(repr(e))
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for coordinator in coordinators:
+        coordinator.close()
+    elapsed = time.perf_counter() - start
+
+    df = FishLog(backend, BASE_NAME).load()
+    written = df[df['user'] >= 0].groupby(['user', 'seq']).size()
+    expected = users * args.records
+    return {
+        'seconds': elapsed,
+        'expected': expected,
+        'lost': expected - len(written),
+        'duplicated': int((written - 1).sum()),
+        'batches': sum(c.batches for c in coordinators),
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--threads', type=int, default=16, help='users per instance')
+    parser.add_argument('--records', type=int, default=50, help='records per user')
+    parser.add_argument('--instances', type=int, default=2)
+    parser.add_argument('--compact-every', type=int, default=5)
+    parser.add_argument('--window', type=float, default=0.05, help="coordinator's batching window, seconds")
+    parser.add_argument('--pause', type=float, default=0.01, help="longest pause between a user's records, seconds")
+    args = parser.parse_args()
+
+    print(f"{'mode':>12} {'records':>8} {'lost':>6} {'twice':>6} {'seconds':>8} {'records/s':>10} {'uploads':>8} {'errors':>7}")
+    failed = False
+    for mode in ['overwrite', 'coordinator']:
+        with tempfile.TemporaryDirectory() as root:
+            result = run(mode, root, args)
+        uploads = result['expected'] if mode == 'overwrite' else result['batches']
+        print(f"{mode:>12} {result['expected']:>8} {result['lost']:>6} {result['duplicated']:>6} {result['seconds']:>8.2f} "
+              f"{result['expected'] / result['seconds']:>10.0f} {uploads:>8} {len(result['errors']):>7}")
+        for error in result['errors'][:3]:
+            print(f"{'':>12} {error}")
+        if mode == 'coordinator':
+            failed = bool(result['lost'] or result['duplicated'] or result['errors'])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Synthetic fishing logs for the benchmarks.
+
+Whole trips (a day at one location) are resampled from the cleaned log, moved
+to another year and a few days either way, and get their measurements
+jittered, so the schema and category mix match the real data while the number
+of distinct trips and feature rows grows with the number of rows.
+
+``synthetic_reports`` does the same for uncleaned notebook entries, in the raw
+``Winni Reports.csv`` layout the bulk import and cleaning code read.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+SOURCE = os.path.join(os.path.dirname(__file__), '..', 'model_data', 'winni_reports.csv')
+RAW_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'Winni Reports.csv')
+
+
+def synthetic_log(rows, seed=0):
+    base = pd.read_csv(SOURCE, index_col=0)
+    rng = np.random.default_rng(seed)
+
+    trip = base.groupby(['date', 'location']).ngroup().to_numpy()
+    members = [np.flatnonzero(trip == t) for t in range(trip.max() + 1)]
+    picks = rng.integers(0, len(members), rows // (len(base) // len(members)) + 1)
+    sizes = np.array([len(members[t]) for t in picks])
+    df = base.iloc[np.concatenate([members[t] for t in picks])].reset_index(drop=True)
+
+    # each copied trip gets its own date and conditions
+    per_trip = lambda values: np.repeat(values, sizes)  # noqa: E731
+    dates = pd.to_datetime(df['date'])
+    years = dates.dt.year + per_trip(rng.integers(0, 200, len(picks))) - 100
+    days = np.clip(dates.dt.day + per_trip(rng.integers(-3, 4, len(picks))), 1, 28)
+    dates = pd.to_datetime(pd.DataFrame({'year': years, 'month': dates.dt.month, 'day': days}))
+    df['date'] = dates.dt.strftime('%Y-%m-%d')
+    df['year'] = dates.dt.year.astype('int64')
+    df['air_temp_f'] = (df['air_temp_f'] + per_trip(rng.normal(0, 3, len(picks)))).round(1)
+    df['water_temp_f'] = (df['water_temp_f'] + per_trip(rng.normal(0, 1, len(picks)))).round(1)
+    df['wind_speed_mph'] = np.clip(df['wind_speed_mph'] + per_trip(rng.integers(-2, 3, len(picks))), 0, None)
+
+    # and each fish its own size and depth
+    caught = df['fish_length_in'] > 0
+    df.loc[caught, 'fish_length_in'] = np.clip(df.loc[caught, 'fish_length_in'] + rng.normal(0, 1, caught.sum()), 1, None).round(1)
+    df['water_depth_ft'] = np.clip(df['water_depth_ft'] + rng.normal(0, 3, len(df)), 0, None).round(1)
+    return df.iloc[:rows].copy()
+
+
+def synthetic_reports(rows, seed=0):
+    base = pd.read_csv(RAW_SOURCE)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+
+    # spread the entries over more seasons, keeping the notebook's M/D/YYYY dates
+    dates = pd.to_datetime(df['date'], format='%m/%d/%Y')
+    years = dates.dt.year + rng.integers(-50, 50, rows)
+    df['year'] = years
+    df['date'] = dates.dt.month.astype(str) + '/' + dates.dt.day.astype(str) + '/' + years.astype(str)
+    df['air_temp_f'] = (df['air_temp_f'] + rng.normal(0, 3, rows)).round(1)
+    df['water_temp_f'] = (df['water_temp_f'] + rng.normal(0, 1, rows)).round(1)
+    return df
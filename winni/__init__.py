@@ -0,0 +1 @@
+"""Data, modeling and storage helpers for the Winnipesaukee fishing reports app."""
@@ -0,0 +1,197 @@
+"""
+Process-wide cache of the parsed fishing log.
+
+Each request does a cheap metadata check (``FishLog.version``) and only
+downloads and parses the log again when that version has changed.  The check
+is made outside the cache's lock, and a new version is loaded once, by the
+first session to see it, while the others wait for that load rather than
+for the lock.  The parsed frame is shared by every session, so callers must
+treat it as read-only and copy before adding columns.  ``prepare`` (``winni.schema.compact`` in the app)
+converts each newly loaded version once, before it is shared.
+"""
+
+import hashlib
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from winni import metrics
+
+
+def _row_hashes(values):
+    """Bytes standing for each value of the column ``values``, in row order."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # by category value, so the same rows match whatever the vocabulary's order
+        hashes = pd.util.hash_array(np.asarray(values.cat.categories, dtype=object))
+        return np.append(hashes, 0)[values.cat.codes.to_numpy()].tobytes()
+    values = values.to_numpy()
+    if values.dtype == object:
+        return pd.util.hash_array(values).tobytes()
+    return np.ascontiguousarray(values).tobytes()
+
+
+class RowDigest:
+    """
+    Digest of a frame's rows that can be extended with rows appended later.
+
+    Structures carried from one version of the log to the next (``extend``)
+    keep one, so they can tell an append from a log whose earlier rows were
+    replaced (a re-migrated base, say) and rebuild in that case.
+    """
+
+    def __init__(self, df):
+        self.count = 0
+        self._columns = {col: hashlib.sha1() for col in df.columns}
+        self._update(df)
+
+    def _update(self, df):
+        for col, digest in self._columns.items():
+            digest.update(_row_hashes(df[col]))
+        self.count += len(df)
+
+    def hexdigest(self):
+        combined = hashlib.sha1(repr(list(self._columns)).encode('utf-8'))
+        for digest in self._columns.values():
+            combined.update(digest.digest())
+        return combined.hexdigest()
+
+    def extend(self, df):
+        """
+        The digest of ``df`` if it starts with the rows digested here, or
+        None if those rows changed.  Reads each row of ``df`` once.
+        """
+        if len(df) < self.count or list(df.columns) != list(self._columns):
+            return None
+        digest = RowDigest(df.iloc[:self.count])
+        if digest.hexdigest() != self.hexdigest():
+            return None
+        digest._update(df.iloc[self.count:])
+        return digest
+
+
+class DatasetCache:
+    """Keeps the latest parsed copy of a ``FishLog`` keyed on its version."""
+
+    def __init__(self, fish_log, history=200, prepare=None):
+        self.fish_log = fish_log
+        # called as prepare(df, previous) on every newly loaded version, where
+        # previous is the last prepared frame (kept across invalidate) or None
+        self.prepare = prepare
+        self._prepared = None
+        self.version = None
+        self.df = None
+        self.hits = 0
+        self.misses = 0
+        # recent load latencies in seconds, split by whether we had to parse
+        self.cold_times = deque(maxlen=history)
+        self.warm_times = deque(maxlen=history)
+        self._lock = threading.Lock()
+        # version -> Future for the frame, while it is being loaded
+        self._loading = {}
+        # name -> (version, object built from that version's frame)
+        self._derived = {}
+
+    def snapshot(self):
+        """Return ``(version, df)`` for the current contents of the log."""
+        start = time.perf_counter()
+        # a metadata round trip, so not made under the lock every session takes
+        version = self.fish_log.version()
+        owner = False
+        with self._lock:
+            if version == self.version and self.df is not None:
+                self.hits += 1
+                metrics.count('dataset.hit')
+                self.warm_times.append(time.perf_counter() - start)
+                return self.version, self.df
+            # one load per version; sessions asking for it meanwhile wait for that one
+            loading = self._loading.get(version)
+            if loading is not None:
+                metrics.count('dataset.wait')
+            else:
+                loading = self._loading[version] = Future()
+                previous = self._prepared
+                owner = True
+        if not owner:
+            return version, loading.result()
+
+        try:
+            df = self.fish_log.load()
+            if self.prepare is not None:
+                df = self.prepare(df, previous)
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(version, None)
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            if self.prepare is not None:
+                self._prepared = df
+            self.version, self.df = version, df
+            self._loading.pop(version, None)
+            self.misses += 1
+            metrics.count('dataset.miss')
+            self.cold_times.append(time.perf_counter() - start)
+        loading.set_result(df)
+        return version, df
+
+    def get(self):
+        return self.snapshot()[1]
+
+    def derived(self, name, build, update=None):
+        """
+        Return ``build(df)`` for the cached version, building it at most once
+        per version.  Only the latest version's object is kept.
+
+        If ``update`` is given it is called as ``update(previous, df)`` instead
+        of ``build`` when an object from an older version exists, so builders
+        can carry work over from the previous version.
+        """
+        with self._lock:
+            version, df = self.version, self.df
+        if df is None:
+            version, df = self.snapshot()
+
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] == version:
+            metrics.count(f'{name}.hit')
+            return cached[1]
+        metrics.count(f'{name}.miss')
+        with metrics.span(f'{name}.build'):
+            if cached is not None and update is not None:
+                value = update(cached[1], df)
+            else:
+                value = build(df)
+        self._derived[name] = (version, value)
+        return value
+
+    def invalidate(self):
+        """Drop the cached frame, e.g. right after a successful write."""
+        with self._lock:
+            self.version = None
+            self.df = None
+
+    def metrics(self):
+        """Hit/miss counts and median/worst cold and warm load latency in ms."""
+        def summary(times):
+            if not times:
+                return {'count': 0, 'p50_ms': None, 'max_ms': None}
+            return {
+                'count': len(times),
+                'p50_ms': round(statistics.median(times) * 1000, 2),
+                'max_ms': round(max(times) * 1000, 2),
+            }
+
+        return {
+            'version': self.version,
+            'memory_mb': None if self.df is None else round(self.df.memory_usage(deep=True).sum() / 2**20, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'cold': summary(list(self.cold_times)),
+            'warm': summary(list(self.warm_times)),
+        }
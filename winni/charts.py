@@ -0,0 +1,202 @@
+"""
+Cached chart specs for the app's pages.
+
+The pages used to draw a new matplotlib figure (a pie, and a 16x9 seaborn
+scatter of every row) on each rerun and never close it, so a long-running
+server kept every figure it had drawn.  Charts are now Vega-Lite specs built
+with Altair from data the page has already aggregated and drawn by the
+browser, so the server keeps no figures and sends a few rows per chart
+rather than a PNG.
+
+``ChartCache`` keeps the built specs in an LRU keyed by chart type, data
+version and the page's filter settings, so a rerun with the same settings
+reuses the spec.  ``cluster_scatter`` bins the points on a grid once there are
+more than ``MAX_POINTS`` of them, so the spec stays the same size however
+large the log grows.
+
+Specs are dicts with their data frames under ``datasets``, in the form
+``st.vega_lite_chart`` takes.  Altair is only imported by the builders, so
+pages that share ``ChartCache`` through ``winni.pages.data`` without drawing
+a chart (Add Fish, Diagnostics) don't load it.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from winni import metrics
+
+MAX_POINTS = 5000
+BINS = 50
+# seaborn's "colorblind" palette, which the cluster scatter plots used
+PALETTE = ['#0173b2', '#de8f05', '#029e73', '#d55e00', '#cc78bc', '#ca9161', '#fbafe4', '#949494', '#ece133', '#56b4e9']
+MONTHS = {4: 'April', 5: 'May', 6: 'June', 7: 'July', 8: 'August', 9: 'September'}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ChartCache:
+    """LRU cache of chart specs keyed by chart type, data version and parameters."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind, data_key, params, build):
+        """The spec for ``kind`` with ``params`` on ``data_key``, calling ``build()`` on a miss."""
+        key = (kind, data_key, _freeze(params))
+        with self._lock:
+            if key in self._specs:
+                self._specs.move_to_end(key)
+                self.hits += 1
+                metrics.count('charts.hit')
+                return self._specs[key]
+            self.misses += 1
+        metrics.count('charts.miss')
+
+        with metrics.span(f'charts.{kind}'):
+            spec = build()
+        with self._lock:
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+        return spec
+
+    def metrics(self):
+        return {'entries': len(self._specs), 'hits': self.hits, 'misses': self.misses}
+
+
+def _spec(chart, **datasets):
+    spec = chart.to_dict()
+    spec['datasets'] = datasets
+    return spec
+
+
+def pie_chart(share, title):
+    """Share of records per fish type (``FishQuery.fish_type_share``) as a pie."""
+    import altair as alt
+
+    data = pd.DataFrame({
+        'Fish Type': share.index.map(lambda x: x.title()),
+        'Percent Caught': share.to_numpy(),
+    })
+    base = alt.Chart(alt.NamedData('share')).encode(
+        theta=alt.Theta('Percent Caught:Q', stack=True),
+        color=alt.Color('Fish Type:N', sort=None),
+        order=alt.Order('Percent Caught:Q', sort='descending'),
+        tooltip=['Fish Type:N', alt.Tooltip('Percent Caught:Q', format='.1%')],
+    )
+    pie = base.mark_arc(outerRadius=120, stroke='white', strokeWidth=3)
+    labels = base.mark_text(radius=145, size=11).encode(text=alt.Text('Percent Caught:Q', format='.1%'))
+    chart = alt.layer(pie, labels).properties(title=title, width=400, height=320)
+    return _spec(chart, share=data)
+
+
+def month_chart(counts):
+    """Times fished and skunked per month (``FishQuery.month_counts``), stacked as ``st.bar_chart`` drew them."""
+    import altair as alt
+
+    data = counts.melt('Month', var_name='Count', value_name='Times')
+    data['Month'] = data['Month'].map(MONTHS)
+    chart = alt.Chart(alt.NamedData('months')).mark_bar().encode(
+        x=alt.X('Month:N', sort=list(MONTHS.values())),
+        y=alt.Y('Times:Q', axis=alt.Axis(tickMinStep=1)),
+        color=alt.Color('Count:N', title=None),
+        tooltip=['Month:N', 'Count:N', 'Times:Q'],
+    ).properties(width=600, height=300)
+    return _spec(chart, months=data)
+
+
+def location_bars(counts, value, title):
+    """One bar per location for a ``FishQuery.days_fished``/``fish_caught`` frame, tallest first."""
+    import altair as alt
+
+    chart = alt.Chart(alt.NamedData('locations')).mark_bar(size=40).encode(
+        x=alt.X('location:N', sort='-y', axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y(f'{value}:Q', axis=alt.Axis(tickMinStep=1)),
+    ).properties(
+        title = title,
+        width=800,
+        height=600
+    ).configure_title(
+        fontSize=15,
+        color='black'
+    )
+    return _spec(chart, locations=counts)
+
+
+def _binned(x, y, cluster, bins):
+    """Points per (cluster, x bin, y bin), placed at the mean of the points in each."""
+    def bin_of(values):
+        low, high = np.nanmin(values), np.nanmax(values)
+        scaled = (values - low) / ((high - low) or 1.0) * bins
+        return np.clip(scaled.astype(np.int64), 0, bins - 1)
+
+    key = (cluster.astype(np.int64) * bins + bin_of(x)) * bins + bin_of(y)
+    cells, codes, counts = np.unique(key, return_inverse=True, return_counts=True)
+    return pd.DataFrame({
+        'x': np.bincount(codes, weights=x) / counts,
+        'y': np.bincount(codes, weights=y) / counts,
+        'cluster': cells // (bins * bins),
+        'points': counts,
+    })
+
+
+def cluster_scatter(x, y, labels, x_name, y_name, centers=None, max_points=MAX_POINTS, bins=BINS):
+    """
+    Rows colored by cluster, with the ``centers`` (if any) marked and labeled.
+
+    Past ``max_points`` rows the points are binned into a ``bins`` x ``bins``
+    grid per cluster and each occupied cell is drawn once, sized by its count.
+    """
+    import altair as alt
+
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    labels = np.asarray(labels)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y, labels = x[keep], y[keep], labels[keep]
+
+    if len(x) > max_points:
+        points = _binned(x, y, labels, bins)
+        size = alt.Size('points:Q', title='Fish', scale=alt.Scale(range=[30, 600]))
+    else:
+        points = pd.DataFrame({'x': x, 'y': y, 'cluster': labels, 'points': 1})
+        size = alt.value(100)
+
+    clusters = sorted(np.unique(labels).tolist())
+    color = alt.Color('cluster:N', title='Cluster', scale=alt.Scale(domain=clusters, range=PALETTE))
+    layers = [
+        alt.Chart(alt.NamedData('points')).mark_circle(opacity=0.8).encode(
+            x=alt.X('x:Q', title=x_name, scale=alt.Scale(zero=False)),
+            y=alt.Y('y:Q', title=y_name, scale=alt.Scale(zero=False)),
+            color=color,
+            size=size,
+            tooltip=['cluster:N', alt.Tooltip('x:Q', title=x_name), alt.Tooltip('y:Q', title=y_name), 'points:Q'],
+        )
+    ]
+    datasets = {'points': points}
+
+    if centers is not None:
+        datasets['centers'] = pd.DataFrame({
+            'x': centers[:, 0],
+            'y': centers[:, 1],
+            'label': [f'Cluster #{ix + 1}' for ix in range(len(centers))],
+        })
+        center = alt.Chart(alt.NamedData('centers')).encode(x='x:Q', y='y:Q')
+        layers.append(center.mark_point(size=200, filled=True, color='#a8323e'))
+        layers.append(center.mark_text(dx=30, dy=-20, fontSize=16, color='#a8323e').encode(text='label:N'))
+
+    chart = alt.layer(*layers).properties(width=800, height=450)
+    return _spec(chart, **datasets)
@@ -0,0 +1,255 @@
+"""
+The cleaning rules from ``data_cleaning.ipynb`` as whole-column operations,
+shared by the cleaning notebook, "Add Fish" and the bulk import.
+
+Text rules (``rough_location``, ``change_fish_type``, ``change_weather``) and
+date/"H:MM" time parsing run once per distinct value and are spread back to
+the rows through their category codes, so the cost grows with the number of
+distinct locations, dates and times rather than with the number of rows.
+
+``clean_reports`` cleans a frame of notebook entries in the raw
+``Winni Reports.csv`` layout (or rows already in the cleaned layout) into
+fishing log rows.  ``clean_file`` does the same for a file of any size, a
+chunk at a time.
+"""
+
+import numpy as np
+import pandas as pd
+
+# the cleaned log's columns, in the order the cleaning notebook writes them
+LOG_COLUMNS = [
+    'year', 'date', 'air_temp_f', 'water_temp_f', 'wind_speed_mph', 'wind_dir', 'weather', 'location',
+    'time_caught', 'fish_type', 'fish_length_in', 'water_depth_ft', 'skunked', 'lines_in', 'lines_out',
+    'general_loc', 'duration_min', 'month', 'hour',
+]
+# what an entry needs before it can be cleaned; the rest may be blank
+REQUIRED_COLUMNS = ['date', 'wind_speed_mph', 'location', 'lines_in', 'lines_out']
+NUMERIC_COLUMNS = ['air_temp_f', 'water_temp_f', 'wind_speed_mph', 'fish_length_in', 'water_depth_ft']
+# blanks filled with the column's mean for the row's month / fish type
+FILLS = {
+    'air_temp_f': 'month',
+    'water_temp_f': 'month',
+    'fish_length_in': 'fish_type',
+    'water_depth_ft': 'fish_type',
+}
+
+DIRECTIONS = ['east', 'west', 'north', 'south', 'of']
+FISH_TYPES = {'small mouth bass': 'smallmouth'}
+WEATHER = {
+    'calm': 'sunny',
+    'partly sunny': 'sunny',
+    'slight wind': 'sunny',
+    'rainy': 'raining',
+    'cloudy': 'overcast',
+}
+CLOCK = r'^\s*(\d{1,2}):(\d{2})(?::\d{2}(?:\.\d+)?)?\s*$'
+
+
+def _distinct(values):
+    """Category codes and distinct values; missing values get the last slot."""
+    codes, uniques = pd.factorize(values)
+    return np.where(codes < 0, len(uniques), codes), pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+
+
+def _lookup(values, rule):
+    """Apply ``rule`` to each distinct value of ``values`` and spread the results back."""
+    codes, uniques = _distinct(values)
+    return pd.Series([rule(value) for value in uniques] + [rule(np.nan)], dtype=object).to_numpy()[codes]
+
+
+def _text(value):
+    return value.strip().lower() if isinstance(value, str) and value.strip() else np.nan
+
+
+def _renamed(renames):
+    def rule(value):
+        text = _text(value)
+        return renames.get(text, text)
+    return rule
+
+
+def rough_location(location):
+    """'north of lockes' -> 'lockes', as the notebook derives ``general_loc``."""
+    return ' '.join(word for word in location.split() if word not in DIRECTIONS)
+
+
+def locations(values):
+    """Tidied (stripped, lower case) location names; blanks stay NaN."""
+    return _lookup(values, _text)
+
+
+def general_locations(values):
+    """The area each location is in (``rough_location``); blanks stay NaN."""
+    return _lookup(values, lambda value: rough_location(_text(value)) if isinstance(_text(value), str) else np.nan)
+
+
+def fish_types(values):
+    """``change_fish_type``: tidied fish names with the notebook's renames."""
+    return _lookup(values, _renamed(FISH_TYPES))
+
+
+def weather_conditions(values):
+    """``change_weather``: calm/partly sunny/slight wind -> sunny, rainy -> raining, cloudy -> overcast."""
+    return _lookup(values, _renamed(WEATHER))
+
+
+def wind_directions(values):
+    return _lookup(values, _text)
+
+
+def clock_minutes(values):
+    """
+    Minutes after midnight for "H:MM" or "HH:MM:SS" times, NaN for anything
+    else.  Also reads "H:MM" durations, as in the raw ``duration`` column.
+    """
+    codes, uniques = _distinct(values)
+    parts = uniques.astype(str).str.extract(CLOCK).astype(float)
+    minutes = parts[0] * 60 + parts[1]
+    minutes[(parts[0] >= 24) | (parts[1] >= 60)] = np.nan
+    return np.append(minutes.to_numpy(), np.nan)[codes]
+
+
+def clock_text(values):
+    """The times in ``values`` as "H:MM" text, NaN where they don't parse."""
+    return _minutes_text(clock_minutes(values))
+
+
+def _minutes_text(minutes):
+    codes, uniques = _distinct(minutes)
+    text = [f'{int(m) // 60}:{int(m) % 60:02d}' for m in uniques] + [np.nan]
+    return pd.Series(text, dtype=object).to_numpy()[codes]
+
+
+def parse_dates(values):
+    """``pd.to_datetime`` per distinct value; NaT where a date doesn't parse."""
+    codes, uniques = _distinct(values)
+    dates = pd.DatetimeIndex(pd.to_datetime(uniques, errors='coerce'))
+    return dates.append(pd.DatetimeIndex([pd.NaT])).take(codes)
+
+
+def _skunked(value):
+    return str(value).strip().lower() in ('true', '1', 'yes')
+
+
+def normalize_reports(raw):
+    """
+    Apply the row-by-row rules to ``raw`` without filling blank measurements.
+
+    Returns ``(df, rejected)``: the normalized rows, and the raw rows that
+    could not be cleaned with a ``reason``.
+    """
+    raw = raw.drop(columns=[col for col in raw.columns if col.startswith('Unnamed:')])
+    raw = raw.rename(columns={'time_caught': 'time'})
+    missing = [col for col in REQUIRED_COLUMNS if col not in raw]
+    if missing:
+        raise ValueError(f'missing columns: {", ".join(missing)}')
+
+    def column(col):
+        return raw[col] if col in raw else pd.Series(np.nan, index=raw.index)
+
+    df = pd.DataFrame(index=raw.index)
+    reason = pd.Series('', index=raw.index)
+
+    def reject(mask, why):
+        reason[np.asarray(mask) & (reason == '')] = why
+
+    df['date'] = parse_dates(raw['date'])
+    reject(df['date'].isna(), 'bad date')
+    df['year'] = pd.to_numeric(column('year'), errors='coerce').fillna(df['date'].dt.year)
+    df['month'] = df['date'].dt.month
+
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(column(col), errors='coerce')
+        reject(df[col].isna() & column(col).notna(), f'bad {col}')
+    reject(df['wind_speed_mph'].isna(), 'bad wind_speed_mph')
+
+    df['location'] = locations(raw['location'])
+    reject(df['location'].isna(), 'no location')
+    df['general_loc'] = general_locations(df['location'])
+
+    lines_in, lines_out = clock_minutes(raw['lines_in']), clock_minutes(raw['lines_out'])
+    df['duration_min'] = lines_out - lines_in
+    reject(np.isnan(lines_in) | np.isnan(lines_out), 'bad lines_in/lines_out')
+    reject(df['duration_min'] < 0, 'lines_out before lines_in')
+    df['lines_in'] = _minutes_text(lines_in)
+    df['lines_out'] = _minutes_text(lines_out)
+
+    df['wind_dir'] = wind_directions(column('wind_dir'))
+    df['weather'] = weather_conditions(column('weather'))
+    df['fish_type'] = fish_types(column('fish_type'))
+    df['skunked'] = _lookup(column('skunked'), _skunked).astype(bool)
+    caught = clock_minutes(column('time'))
+    df['time_caught'] = _minutes_text(caught)
+    df['hour'] = np.nan_to_num(caught // 60).astype(int)
+
+    df = df.fillna({
+        'wind_dir': 'no_wind',
+        'weather': 'no_weather_recorded',
+        'fish_type': 'no_fish_caught',
+        'time_caught': 'no_time_recorded',
+    })
+    return df[reason == ''], raw[reason != ''].assign(reason=reason[reason != ''])
+
+
+def fill_totals(df, totals=None):
+    """
+    Add ``df``'s per-group sums and counts of the ``FILLS`` columns to
+    ``totals``, so fill means can be gathered a chunk at a time.
+    """
+    totals = dict(totals or {})
+    for col, by in FILLS.items():
+        groups = df.groupby(by, observed=True)[col].agg(['sum', 'count'])
+        totals[col] = groups if col not in totals else totals[col].add(groups, fill_value=0)
+    return totals
+
+
+def fill_blanks(df, totals):
+    """Fill the ``FILLS`` columns with their group means (then zero) and round as the notebook does."""
+    df = df.copy()
+    for col, by in FILLS.items():
+        means = totals[col]['sum'] / totals[col]['count']
+        df[col] = df[col].fillna(df[by].map(means))
+    df[['fish_length_in', 'water_depth_ft']] = df[['fish_length_in', 'water_depth_ft']].fillna(0)
+
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    df['year'] = df['year'].astype(int)
+    df['month'] = df['month'].astype(int)
+    df[NUMERIC_COLUMNS + ['duration_min']] = df[NUMERIC_COLUMNS + ['duration_min']].round(1)
+    return df[LOG_COLUMNS].reset_index(drop=True)
+
+
+def clean_reports(raw, reference=None):
+    """
+    Clean notebook entries into fishing log rows.
+
+    Blank temperatures, fish lengths and depths are filled with the
+    month/fish type means, taken over ``raw`` together with ``reference``
+    (usually the current log) when given.
+
+    Returns ``(cleaned, rejected)``: the cleaned rows in ``LOG_COLUMNS``
+    order, and the raw rows that could not be cleaned with a ``reason``.
+    """
+    df, rejected = normalize_reports(raw)
+    totals = fill_totals(df, None if reference is None else fill_totals(reference))
+    return fill_blanks(df, totals), rejected
+
+
+def clean_file(source, reference=None, chunksize=100_000):
+    """
+    Clean a notebook CSV of any size, yielding ``(cleaned, rejected)`` per
+    chunk of ``chunksize`` rows.
+
+    The fill means need every row, so the file is read twice: once to total
+    the measurements per month and fish type, then again to clean.  Only one
+    chunk is held in memory at a time.  ``source`` is a path or a callable
+    returning a fresh file object.
+    """
+    def chunks():
+        return pd.read_csv(source() if callable(source) else source, chunksize=chunksize)
+
+    totals = None if reference is None else fill_totals(reference)
+    for chunk in chunks():
+        totals = fill_totals(normalize_reports(chunk)[0], totals)
+    for chunk in chunks():
+        df, rejected = normalize_reports(chunk)
+        yield fill_blanks(df, totals), rejected
@@ -0,0 +1,506 @@
+"""
+Cached KMeans and DBSCAN fits for the "How Is My Data Clustered?" page.
+
+The page's sliders cover a small grid (2-5 KMeans clusters; DBSCAN eps
+0.2-2.0 by 0.2 and min_samples 5-8), so ``ClusterService`` fits the whole grid
+for the current data version in a background process pool and keeps the
+results in an LRU cache.  A slider move is then a dictionary lookup.
+
+Results are keyed by the data version, the feature columns and the model
+parameters, so a fit on older data is never returned for newer data.
+
+DBSCAN runs on a precomputed ``NeighborhoodGraph`` so the grid shares one
+neighbor search instead of repeating it for every eps/min_samples pair: one
+graph per data version, built at the grid's largest eps and handed to both
+the background and the foreground fits.
+
+KMeans centroids are kept by ``KMeansStore`` next to the log and updated
+with the rows added since they were fitted, refitting only when they drift
+(``KMeansStore.stale`` says which cluster counts are worth fitting ahead).
+"""
+
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import DBSCAN, KMeans
+from sklearn.metrics import silhouette_score
+from sklearn.neighbors import NearestNeighbors
+
+from winni import metrics
+from winni.storage import Conflict, NotFound
+
+KMEANS_GRID = [{'n_clusters': n} for n in range(2, 6)]
+DBSCAN_GRID = [
+    {'eps': round(eps, 1), 'min_samples': min_samples}
+    for eps in np.arange(0.2, 2.01, 0.2)
+    for min_samples in range(5, 9)
+]
+
+# silhouette is quadratic in the number of rows, so score a sample past this
+SILHOUETTE_SAMPLE = 5000
+# parameter sets per background task: small enough that waiting on a started
+# one costs a few fits, not the whole grid
+PREFETCH_CHUNK = 4
+
+ClusterResult = namedtuple('ClusterResult', ['labels', 'centers', 'inertia', 'silhouette'])
+
+
+def _silhouette(X, labels):
+    if len(np.unique(labels)) < 2 or len(np.unique(labels)) >= len(labels):
+        return None
+    sample = SILHOUETTE_SAMPLE if len(labels) > SILHOUETTE_SAMPLE else None
+    with metrics.span('clusters.silhouette'):
+        return float(silhouette_score(X, labels, sample_size=sample, random_state=0))
+
+
+def fit_kmeans(X, n_clusters):
+    """KMeans as the page runs it: ``random_state=0`` on the selected columns."""
+    with metrics.span('clusters.kmeans'):
+        kmeans = KMeans(n_clusters, random_state=0).fit(X)
+    labels = kmeans.labels_.astype(np.int16)
+    return ClusterResult(labels, kmeans.cluster_centers_, float(kmeans.inertia_), _silhouette(X, labels))
+
+
+class NeighborhoodGraph:
+    """
+    Sparse radius-neighbors graph for running DBSCAN at any ``eps`` up to
+    ``max_eps`` without recomputing distances.
+
+    The graph is built once (with a KD/ball tree) per data version; each
+    DBSCAN fit then only filters the stored distances.  Past ``max_points``
+    rows the graph is built over a random sample instead, each sampled
+    neighbor standing in for ``n / max_points`` rows when counting towards
+    ``min_samples`` (the point itself still counts once), and the remaining
+    rows are border points of the nearer of their two nearest sampled points
+    that is core and within ``eps``.  That keeps memory bounded (the exact graph grows with the
+    square of the number of rows) at the cost of approximate labels.
+    """
+
+    def __init__(self, X, max_eps=2.0, max_points=20000, seed=0):
+        self.n = len(X)
+        self.max_eps = max_eps
+        self.max_points = max_points
+        self.approximate = self.n > max_points
+        with metrics.span('clusters.dbscan_graph'):
+            if self.approximate:
+                rng = np.random.default_rng(seed)
+                self.sample = np.sort(rng.choice(self.n, max_points, replace=False))
+                self.points = X[self.sample]
+                # the rest of the rows only need their nearest sampled points, found
+                # once here so each fit is a lookup; two, so a row whose nearest
+                # isn't core can still join the cluster of the next
+                self.rest = np.setdiff1d(np.arange(self.n), self.sample)
+                distance, nearest = NearestNeighbors(n_neighbors=2, algorithm='brute').fit(self.points).kneighbors(X[self.rest])
+                self.rest_distance = distance.astype(np.float32)
+                self.rest_nearest = nearest.astype(np.int32)
+            else:
+                self.sample = None
+                self.points = X
+            self.graph = NearestNeighbors(radius=max_eps).fit(self.points).radius_neighbors_graph(mode='distance')
+
+    def within(self, eps):
+        """
+        This graph with only the neighbors within ``eps``, for fits (and
+        worker processes) that need no more; DBSCAN on the full graph spends
+        most of its time skipping the far pairs.
+        """
+        if eps > self.max_eps:
+            raise ValueError(f'eps {eps} is larger than the graph radius {self.max_eps}')
+        if eps == self.max_eps:
+            return self
+        keep = self.graph.data <= eps
+        indptr = np.concatenate([[0], np.cumsum(keep)])[self.graph.indptr]
+        within = copy.copy(self)
+        within.max_eps = eps
+        within.graph = sparse.csr_matrix((self.graph.data[keep], self.graph.indices[keep], indptr), shape=self.graph.shape)
+        return within
+
+    def dbscan(self, eps, min_samples):
+        """DBSCAN labels for every row of ``X``."""
+        graph = self.within(eps).graph
+        if not self.approximate:
+            return DBSCAN(eps=eps, min_samples=min_samples, metric='precomputed').fit(graph).labels_
+
+        # a sampled point is core when itself plus its sampled neighbors, n /
+        # max_points rows each, reach min_samples: 1 + neighbors * n / max_points
+        # >= min_samples.  Neighbor counts are whole, so that is a plain
+        # min_samples on the sample (scaling the point's own weight too would
+        # make every point core once n / max_points >= min_samples)
+        sampled = -(-(min_samples - 1) * self.max_points // self.n) + 1
+        dbscan = DBSCAN(eps=eps, min_samples=sampled, metric='precomputed').fit(graph)
+        labels = dbscan.labels_
+        core = np.zeros(len(labels), dtype=bool)
+        core[dbscan.core_sample_indices_] = True
+
+        full = np.full(self.n, -1, dtype=labels.dtype)
+        full[self.sample] = labels
+        near = (self.rest_distance <= eps) & core[self.rest_nearest]
+        border = near.any(axis=1)
+        first = near[border].argmax(axis=1)
+        full[self.rest[border]] = labels[self.rest_nearest[border, first]]
+        return full
+
+
+def fit_dbscan(X, eps, min_samples, graph=None):
+    graph = graph or NeighborhoodGraph(X, max_eps=eps)
+    with metrics.span('clusters.dbscan'):
+        labels = graph.dbscan(eps, min_samples).astype(np.int32)
+    return ClusterResult(labels, None, None, _silhouette(X, labels))
+
+
+FITTERS = {'kmeans': fit_kmeans, 'dbscan': fit_dbscan}
+
+
+def _fit_many(kind, X, grid, graph=None):
+    # one task per chunk of the grid so X (and the DBSCAN graph) is only
+    # pickled once per chunk
+    if kind == 'dbscan':
+        return [fit_dbscan(X, graph=graph, **params) for params in grid]
+    return [FITTERS[kind](X, **params) for params in grid]
+
+
+def _key(kind, data_key, columns, params):
+    return (data_key, tuple(columns), kind, tuple(sorted(params.items())))
+
+
+class ClusterService:
+    """LRU cache of cluster fits, filled ahead of time by a process pool."""
+
+    def __init__(self, max_entries=64, workers=None, max_graphs=2):
+        self.max_entries = max_entries
+        self.workers = workers or os.cpu_count() or 1
+        self.max_graphs = max_graphs
+        self._results = OrderedDict()
+        self._pending = {}
+        # (data_key, columns) -> (max_eps, Future for its NeighborhoodGraph)
+        self._graphs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # spawn rather than fork: the app server has threads running
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=get_context('spawn'))
+        return self._pool
+
+    def _store(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+            self._pending.pop(key, None)
+
+    def cached(self, kind, data_key, columns, **params):
+        """The stored result for these parameters, or None."""
+        key = _key(kind, data_key, columns, params)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        return None
+
+    def put(self, kind, data_key, columns, result, **params):
+        self._store(_key(kind, data_key, columns, params), result)
+
+    def neighborhood_graph(self, X, data_key, columns, max_eps):
+        """
+        The DBSCAN graph of ``X`` covering eps up to ``max_eps``, built once
+        per data version and columns; sessions asking while it is being built
+        wait for that build.
+        """
+        key = (data_key, tuple(columns))
+        owner = False
+        with self._lock:
+            entry = self._graphs.get(key)
+            if entry is None or entry[0] < max_eps:
+                entry = self._graphs[key] = (max_eps, Future())
+                owner = True
+            else:
+                metrics.count('clusters.graph_hit')
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+        building = entry[1]
+        if not owner:
+            return building.result()
+
+        try:
+            graph = NeighborhoodGraph(X, max_eps=max_eps)
+        except BaseException as e:
+            with self._lock:
+                if self._graphs.get(key) is entry:
+                    del self._graphs[key]
+            building.set_exception(e)
+            raise
+        building.set_result(graph)
+        return graph
+
+    def get(self, kind, X, data_key, columns, **params):
+        """
+        Return the fit for these parameters, from the cache, from a background
+        fit already running, or by fitting now.  A background chunk that hasn't
+        started yet isn't waited for, since it may be queued behind the rest
+        of the grid.
+        """
+        result = self.cached(kind, data_key, columns, **params)
+        if result is not None:
+            metrics.count('clusters.hit')
+            return result
+        metrics.count('clusters.miss')
+        key = _key(kind, data_key, columns, params)
+        with self._lock:
+            future = self._pending.get(key)
+
+        if future is not None and future.started():
+            try:
+                results, grid = future.result()
+                return results[grid.index(params)]
+            except Exception:
+                # the background fit died (e.g. the pool was shut down); fit here
+                pass
+
+        if kind == 'dbscan':
+            graph = self.neighborhood_graph(X, data_key, columns, params['eps'])
+            result = fit_dbscan(X, graph=graph, **params)
+        else:
+            result = FITTERS[kind](X, **params)
+        self._store(key, result)
+        return result
+
+    def prefetch(self, kind, X, data_key, columns, grid):
+        """Fit every parameter set in ``grid`` not already cached, in the background."""
+        with self._lock:
+            missing = [
+                params for params in grid
+                if _key(kind, data_key, columns, params) not in self._results
+                and _key(kind, data_key, columns, params) not in self._pending
+            ]
+        if not missing:
+            return
+
+        graph = None
+        if kind == 'dbscan':
+            # built here rather than per chunk; the page's own fit needs it next anyway
+            graph = self.neighborhood_graph(X, data_key, columns, max(params['eps'] for params in grid))
+
+        # small chunks so a slider position's fit is never stuck behind the
+        # whole grid
+        chunk = min(PREFETCH_CHUNK, -(-len(missing) // self.workers))
+        for start in range(0, len(missing), chunk):
+            part = missing[start:start + chunk]
+            # each chunk gets the graph only as far as its own largest eps
+            part_graph = graph and graph.within(max(params['eps'] for params in part))
+            future = self.pool.submit(_fit_many, kind, X, part, part_graph)
+            # hand back the grid with the results so waiters can find theirs
+            wrapped = _Chunk(future, part)
+            with self._lock:
+                for params in part:
+                    self._pending[_key(kind, data_key, columns, params)] = wrapped
+            future.add_done_callback(lambda f, part=part: self._finish(kind, data_key, columns, part, f))
+
+    def _finish(self, kind, data_key, columns, part, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                for params in part:
+                    self._pending.pop(_key(kind, data_key, columns, params), None)
+            return
+        for params, result in zip(part, future.result()):
+            self._store(_key(kind, data_key, columns, params), result)
+
+
+class _Chunk:
+    """A pending chunk of background fits and the parameter sets it covers."""
+
+    def __init__(self, future, grid):
+        self.future = future
+        self.grid = grid
+
+    def started(self):
+        return self.future.running() or self.future.done()
+
+    def result(self):
+        return self.future.result(), self.grid
+
+
+class StreamingKMeans:
+    """
+    KMeans centroids that absorb appended rows with mini-batch updates.
+
+    Starts from a full ``fit_kmeans`` result.  New rows are assigned to their
+    nearest centroid and each centroid moves to the running mean of its
+    points (the per-center ``1 / count`` learning rate MiniBatchKMeans uses).
+    ``drift`` compares the new rows' mean squared distance with the one at the
+    last full fit, and how far the centroids have moved relative to the
+    typical cluster radius; past ``threshold`` the caller should refit.
+    """
+
+    def __init__(self, centers, counts, rows, fit_inertia, fit_centers, absorbed_inertia=0.0, absorbed=0):
+        self.centers = np.asarray(centers, dtype=float)
+        self.counts = np.asarray(counts, dtype=float)
+        self.rows = rows
+        # mean squared distance per row at the last full fit
+        self.fit_inertia = fit_inertia
+        self.fit_centers = np.asarray(fit_centers, dtype=float)
+        # squared distance total and row count absorbed since that fit
+        self.absorbed_inertia = absorbed_inertia
+        self.absorbed = absorbed
+
+    @classmethod
+    def from_fit(cls, result, X):
+        counts = np.bincount(result.labels, minlength=len(result.centers))
+        return cls(result.centers, counts, len(X), result.inertia / max(len(X), 1), result.centers)
+
+    def _nearest(self, X):
+        distances = ((X[:, None, :] - self.centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        return labels, distances[np.arange(len(X)), labels]
+
+    def partial_fit(self, X):
+        """Absorb new rows ``X`` into the centroids."""
+        if not len(X):
+            return self
+        labels, distances = self._nearest(X)
+        self.absorbed_inertia += float(distances.sum())
+        self.absorbed += len(X)
+        for cluster in np.unique(labels):
+            points = X[labels == cluster]
+            self.counts[cluster] += len(points)
+            self.centers[cluster] += (points.sum(axis=0) - len(points) * self.centers[cluster]) / self.counts[cluster]
+        self.rows += len(X)
+        return self
+
+    def drift(self):
+        """Largest of the relative inertia increase and the relative centroid shift."""
+        if not self.fit_inertia:
+            return 0.0
+        inertia = (self.absorbed_inertia / self.absorbed) / self.fit_inertia - 1 if self.absorbed else 0.0
+        shift = np.sqrt(((self.centers - self.fit_centers) ** 2).sum(axis=1)).max() / np.sqrt(self.fit_inertia)
+        return max(inertia, shift)
+
+    def result(self, X):
+        """Labels and inertia for every row of ``X`` against the current centroids."""
+        labels, distances = self._nearest(X)
+        labels = labels.astype(np.int16)
+        return ClusterResult(labels, self.centers.copy(), float(distances.sum()), _silhouette(X, labels))
+
+    def to_dict(self):
+        return {
+            'centers': self.centers.tolist(),
+            'counts': self.counts.tolist(),
+            'rows': self.rows,
+            'fit_inertia': self.fit_inertia,
+            'fit_centers': self.fit_centers.tolist(),
+            'absorbed_inertia': self.absorbed_inertia,
+            'absorbed': self.absorbed,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+
+class KMeansStore:
+    """
+    Streaming KMeans states persisted next to the fishing log, one per
+    column pair and cluster count, so a restarted app picks up where it left
+    off instead of refitting.
+
+    The states are written only if nobody else wrote them since they were
+    read (the log's generation preconditions); on a conflict they are read
+    again and the update is applied on top of the other instance's.
+    """
+
+    def __init__(self, fish_log, cluster_service, threshold=0.25, retries=3):
+        self.backend = fish_log.backend
+        self.name = f'{fish_log.base_name}.kmeans.json'
+        self.cluster_service = cluster_service
+        self.threshold = threshold
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._states = None
+        self._generation = None
+
+    def _load(self):
+        """The stored states and the generation they were read at."""
+        if self._states is None:
+            self._generation = self.backend.generation(self.name)
+            try:
+                self._states = json.loads(self.backend.read(self.name))
+            except NotFound:
+                self._states = {}
+        return self._states, self._generation
+
+    @staticmethod
+    def _key(columns, n_clusters):
+        return '|'.join(list(columns) + [str(n_clusters)])
+
+    def _model(self, state, X):
+        """The stored centroids brought up to date with ``X``, or None if they need a full fit."""
+        model = StreamingKMeans.from_dict(state) if state else None
+        if model is None or model.rows > len(X):
+            return None
+        if model.rows < len(X):
+            model.partial_fit(X[model.rows:])
+            if model.drift() > self.threshold:
+                return None
+        return model
+
+    def stale(self, X, columns, grid):
+        """The parameter sets in ``grid`` with no usable stored centroids, which need a full fit."""
+        with self._lock:
+            states = self._load()[0]
+        return [params for params in grid if self._model(states.get(self._key(columns, params['n_clusters'])), X) is None]
+
+    def _save(self, key, model, generation):
+        """Store ``model`` under ``key``, or return False if the file changed since ``generation``."""
+        with self._lock:
+            states = dict(self._load()[0])
+            states[key] = model.to_dict()
+            try:
+                self.backend.write(self.name, json.dumps(states).encode('utf-8'), if_generation_match=generation or 0)
+            except Conflict:
+                metrics.count('clusters.kmeans_conflicts')
+                return False
+            finally:
+                # read back, with its new generation, next time
+                self._states = None
+        return True
+
+    def get(self, X, data_key, columns, n_clusters):
+        """
+        Cluster the rows of ``X`` (the log's ``columns``), reusing the stored
+        centroids when ``X`` only adds rows to what they were fitted on.
+        """
+        result = self.cluster_service.cached('kmeans-stream', data_key, columns, n_clusters=n_clusters)
+        if result is not None:
+            return result
+
+        key = self._key(columns, n_clusters)
+        for _ in range(self.retries + 1):
+            with self._lock:
+                states, generation = self._load()
+                state = states.get(key)
+
+            model = self._model(state, X)
+            if model is None:
+                full = self.cluster_service.get('kmeans', X, data_key, columns, n_clusters=n_clusters)
+                model = StreamingKMeans.from_fit(full, X)
+                result = full
+            else:
+                result = model.result(X)
+
+            # another instance wrote in between: apply the rows to theirs instead
+            if model.to_dict() == state or self._save(key, model, generation):
+                break
+
+        self.cluster_service.put('kmeans-stream', data_key, columns, result, n_clusters=n_clusters)
+        return result
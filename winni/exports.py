@@ -0,0 +1,134 @@
+"""
+CSV and Parquet downloads of the fishing log.
+
+"Show Me My Fish" used to turn both the filtered and the full table into a
+CSV string on every rerun, whether or not anyone clicked download.  Exports
+are now built only when someone asks for one, from the row positions
+``FishQuery.select`` already found, a ``CHUNK_ROWS`` slice at a time, so the
+whole table is never held as text and as bytes at once.
+``ExportCache`` keeps the finished files for every session, keyed by data
+version, filters and format, up to ``max_bytes`` in total, so downloading the
+same table again costs nothing.
+
+Exports are in the log's own layout (``winni.schema.expand``): CSV exports
+are byte for byte what ``df.to_csv()`` gave before the app kept the log
+compact, and Parquet exports (which leave out the index) hold the same
+float64 measurements.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from winni import metrics
+from winni.schema import DATE_COLUMNS, FLOAT_COLUMNS, TIME_COLUMNS, WHOLE_COLUMNS, expand, whole_columns
+
+CHUNK_ROWS = 50_000
+# format -> (mime type, file extension)
+FORMATS = {
+    'CSV': ('text/csv', 'csv'),
+    'Parquet': ('application/octet-stream', 'parquet'),
+}
+
+
+def _positions(df, rows):
+    return np.arange(len(df)) if rows is None else np.asarray(rows)
+
+
+def _whole(df, positions):
+    # only the columns whole_columns looks at, not a copy of every column
+    return whole_columns(df[[col for col in WHOLE_COLUMNS if col in df]].take(positions))
+
+
+def csv_chunks(df, rows=None, chunk_rows=CHUNK_ROWS):
+    """Yield ``df.iloc[rows].to_csv()`` (every row if ``rows`` is None) as UTF-8, a chunk of rows at a time."""
+    positions = _positions(df, rows)
+    if not len(positions):
+        yield expand(df.iloc[:0]).to_csv().encode('utf-8')
+        return
+    whole = _whole(df, positions)
+    for start in range(0, len(positions), chunk_rows):
+        chunk = expand(df.take(positions[start:start + chunk_rows]), whole)
+        yield chunk.to_csv(header=start == 0).encode('utf-8')
+
+
+def parquet_bytes(df, rows=None, chunk_rows=CHUNK_ROWS):
+    """``df.iloc[rows]`` as a Parquet file, one row group per chunk of rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    positions = _positions(df, rows)
+    whole = _whole(df, positions)
+    # types from the whole log, so chunks with only blanks in a column still match
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for col in schema.names:
+        # clock times and dates are written as text, like the CSV, and the
+        # float32 measurements as the numbers they were entered as
+        if col in TIME_COLUMNS + DATE_COLUMNS and not pa.types.is_string(schema.field(col).type):
+            schema = schema.set(schema.get_field_index(col), pa.field(col, pa.string()))
+        elif col in FLOAT_COLUMNS and pa.types.is_float32(schema.field(col).type):
+            schema = schema.set(schema.get_field_index(col), pa.field(col, pa.int64() if col in whole else pa.float64()))
+    sink = pa.BufferOutputStream()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start in range(0, max(len(positions), 1), chunk_rows):
+            chunk = expand(df.take(positions[start:start + chunk_rows]), whole)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return sink.getvalue().to_pybytes()
+
+
+def export_bytes(df, rows=None, file_format='CSV'):
+    """The ``file_format`` (a key of ``FORMATS``) export of ``df.iloc[rows]``."""
+    with metrics.span(f'exports.{file_format.lower()}'):
+        if file_format == 'Parquet':
+            return parquet_bytes(df, rows)
+        # BytesIO hands over its buffer without copying it, unlike joining the chunks
+        out = io.BytesIO()
+        for chunk in csv_chunks(df, rows):
+            out.write(chunk)
+        return out.getvalue()
+
+
+class ExportCache:
+    """LRU cache of finished exports, bounded by their total size."""
+
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, key):
+        """The stored export for ``key``, or None."""
+        with self._lock:
+            if key in self._files:
+                self._files.move_to_end(key)
+                return self._files[key]
+        return None
+
+    def get(self, key, build):
+        """The export for ``key``, calling ``build()`` on a miss."""
+        data = self.cached(key)
+        if data is not None:
+            self.hits += 1
+            metrics.count('exports.hit')
+            return data
+        self.misses += 1
+        metrics.count('exports.miss')
+
+        data = build()
+        with self._lock:
+            if key not in self._files:
+                self._files[key] = data
+                self.size += len(data)
+            self._files.move_to_end(key)
+            # the newest export is kept even if it is larger than the budget on its own
+            while self.size > self.max_bytes and len(self._files) > 1:
+                self.size -= len(self._files.popitem(last=False)[1])
+        return data
+
+    def metrics(self):
+        return {'entries': len(self._files), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,152 @@
+"""
+Feature matrix for the clustering models.
+
+Replaces the ``pd.get_dummies`` + ``StandardScaler().fit_transform`` steps
+that the clustering page reran on every interaction.  ``FeaturePipeline``
+holds a fixed category vocabulary (saved in ``model_data/feature_vocabulary.json``)
+so the app and the notebooks encode the same columns in the same order, and
+``FeatureMatrix`` keeps the encoded float32 matrix plus running column
+statistics so rows added through "Add Fish" are encoded on their own instead
+of redoing the whole log.
+"""
+
+import copy
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from winni import metrics
+from winni.cache import RowDigest
+
+VOCABULARY_PATH = os.path.join(os.path.dirname(__file__), '..', 'model_data', 'feature_vocabulary.json')
+
+# columns kept as-is, in the order pd.get_dummies leaves them
+NUMERIC_COLUMNS = ['year', 'air_temp_f', 'water_temp_f', 'wind_speed_mph', 'water_depth_ft', 'duration_min', 'month', 'hour']
+# one-hot encoded with the first (alphabetical) value dropped, like drop_first=True
+CATEGORY_COLUMNS = ['wind_dir', 'weather', 'general_loc', 'fish_type']
+
+
+class FeaturePipeline:
+    """Encodes the fishing log into the clustering feature columns."""
+
+    def __init__(self, vocabulary, numeric_columns=NUMERIC_COLUMNS):
+        self.vocabulary = {col: sorted(values) for col, values in vocabulary.items()}
+        self.numeric_columns = list(numeric_columns)
+        self.columns = list(self.numeric_columns)
+        for col, values in self.vocabulary.items():
+            self.columns += [f'{col}_{value}' for value in values[1:]]
+
+    @classmethod
+    def from_frame(cls, df, category_columns=CATEGORY_COLUMNS, numeric_columns=NUMERIC_COLUMNS):
+        """Learn the vocabulary from the values present in ``df``."""
+        vocabulary = {col: [str(i) for i in df[col].dropna().unique()] for col in category_columns}
+        return cls(vocabulary, numeric_columns)
+
+    @classmethod
+    def load(cls, path=VOCABULARY_PATH):
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec['vocabulary'], spec['numeric_columns'])
+
+    def save(self, path=VOCABULARY_PATH):
+        with open(path, 'w') as f:
+            json.dump({'numeric_columns': self.numeric_columns, 'vocabulary': self.vocabulary}, f, indent=2)
+            f.write('\n')
+
+    def encode(self, df):
+        """
+        Return the unscaled float32 feature matrix for ``df``.
+
+        Values outside the vocabulary encode as all zeros, the same as the
+        dropped first value.
+        """
+        with metrics.span('features.encode'):
+            out = np.zeros((len(df), len(self.columns)), dtype=np.float32)
+            out[:, :len(self.numeric_columns)] = df[self.numeric_columns].to_numpy(dtype=np.float32)
+
+            offset = len(self.numeric_columns)
+            rows = np.arange(len(df))
+            for col, values in self.vocabulary.items():
+                column = df[col]
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    # look up the column's few categories instead of every row
+                    lookup = np.append(pd.Index(values).get_indexer(column.cat.categories.astype(str)), -1)
+                    codes = lookup[column.cat.codes.to_numpy()]
+                else:
+                    codes = pd.Categorical(column.astype(str), categories=values).codes
+                keep = codes > 0
+                out[rows[keep], offset + codes[keep] - 1] = 1
+                offset += len(values) - 1
+            return out
+
+    def frame(self, matrix, index=None):
+        """Wrap a feature matrix in a DataFrame with the encoded column names."""
+        return pd.DataFrame(matrix, columns=self.columns, index=index)
+
+
+class FeatureMatrix:
+    """
+    Encoded feature matrix for one version of the log, standardized like
+    ``StandardScaler().fit_transform``.
+
+    Column means and variances are kept as running totals, so ``extend`` only
+    encodes the appended rows (once it has checked the earlier rows are the
+    ones they were computed from).
+    """
+
+    def __init__(self, pipeline, df):
+        self.pipeline = pipeline
+        self.digest = RowDigest(df)
+        self.raw = pipeline.encode(df)
+        values = self.raw.astype(np.float64)
+        self.count = len(values)
+        self.mean = values.mean(axis=0) if self.count else np.zeros(len(pipeline.columns))
+        self.m2 = ((values - self.mean) ** 2).sum(axis=0)
+        self._scaled = None
+
+    def extend(self, df):
+        """
+        Return the matrix for ``df``, a later version of the same append-only
+        log.  Falls back to a full rebuild if rows were removed or changed.
+        """
+        digest = self.digest.extend(df)
+        if digest is None:
+            return FeatureMatrix(self.pipeline, df)
+        if len(df) == self.count:
+            return self
+
+        new = self.pipeline.encode(df.iloc[self.count:])
+        values = new.astype(np.float64)
+        # Chan et al.'s parallel update of the running mean and squared deviations
+        count = len(values)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        total = self.count + count
+        delta = mean - self.mean
+
+        # a new object, since other sessions may still be reading this one
+        updated = copy.copy(self)
+        updated.mean = self.mean + delta * count / total
+        updated.m2 = self.m2 + m2 + delta ** 2 * self.count * count / total
+        updated.count = total
+        updated.digest = digest
+        updated.raw = np.vstack([self.raw, new])
+        updated._scaled = None
+        return updated
+
+    @property
+    def scale(self):
+        std = np.sqrt(self.m2 / max(self.count, 1))
+        # constant columns are left unscaled, as StandardScaler does
+        std[std == 0] = 1.0
+        return std
+
+    @property
+    def scaled(self):
+        """The standardized float32 matrix, computed once per data version."""
+        if self._scaled is None:
+            with metrics.span('features.scale'):
+                self._scaled = ((self.raw - self.mean) / self.scale).astype(np.float32)
+        return self._scaled
@@ -0,0 +1,44 @@
+"""
+Bulk import of notebook entries into the fishing log.
+
+A season's notebook is added in one go instead of one "Add Fish" submission
+per fish: the file is cleaned with ``winni.cleaning`` a chunk at a time and
+written as a single append segment, so the storage sees one write however
+many rows the file has, and memory holds one chunk plus the segment's text.
+"""
+
+import io
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from winni.cleaning import clean_file
+
+ImportResult = namedtuple('ImportResult', ['rows', 'rejected', 'segment', 'seconds'])
+
+
+def import_reports(fish_log, source, reference=None, chunksize=100_000):
+    """
+    Clean the entries in ``source`` (a path or the file's bytes) and append
+    them to ``fish_log`` as one segment.
+
+    ``reference`` (usually the current log) feeds the means used to fill
+    blank temperatures, lengths and depths.  Rows that fail validation are not
+    written; they come back in ``rejected`` with the reason.
+    """
+    start = time.perf_counter()
+    if isinstance(source, (bytes, bytearray)):
+        data, source = source, lambda: io.BytesIO(data)
+
+    rows, rejected = 0, []
+
+    def cleaned():
+        nonlocal rows
+        for chunk, bad in clean_file(source, reference, chunksize):
+            rows += len(chunk)
+            rejected.append(bad)
+            yield chunk
+
+    segment = fish_log.append_chunks(cleaned())
+    return ImportResult(rows, pd.concat(rejected) if rejected else pd.DataFrame(), segment, time.perf_counter() - start)
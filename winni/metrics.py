@@ -0,0 +1,172 @@
+"""
+Timing spans and counters for the app's hot paths.
+
+The storage reads and writes, the CSV parse, the filters, the feature
+encoding, the cluster fits and the chart builds are wrapped in ``span``
+blocks, and the caches count their hits and misses with ``count`` (as do the
+storage reads and writes, in bytes).  Everything goes to one rolling store per
+process: the last ``HISTORY`` timings of each span, plus running totals.  The
+hidden diagnostics page shows it and exports it as Prometheus text or JSON
+lines.
+
+Collection is off unless ``WINNI_METRICS`` is set or the diagnostics page
+turns it on.  While it is off ``span`` hands back one shared do-nothing
+context manager and ``count`` returns straight away, so the instrumented code
+pays a function call per stage.
+
+Spans recorded in ``ClusterService``'s worker processes stay in those
+processes; only fits run in the app's own process are timed.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+HISTORY = 500
+
+_enabled = bool(os.environ.get('WINNI_METRICS'))
+
+
+class MetricsStore:
+    """Recent span timings and running totals of spans and counters."""
+
+    def __init__(self, history=HISTORY):
+        self.history = history
+        # name -> deque of (unix time the span ended, seconds)
+        self.spans = {}
+        # name -> [count, total seconds] since startup or the last reset
+        self.totals = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            recent = self.spans.get(name)
+            if recent is None:
+                recent = self.spans[name] = deque(maxlen=self.history)
+                self.totals[name] = [0, 0.0]
+            recent.append((time.time(), seconds))
+            total = self.totals[name]
+            total[0] += 1
+            total[1] += seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.totals.clear()
+            self.counters.clear()
+
+    def _copy(self):
+        with self._lock:
+            spans = {name: np.array([seconds for _, seconds in recent]) for name, recent in self.spans.items()}
+            totals = {name: tuple(total) for name, total in self.totals.items()}
+            return spans, totals, dict(self.counters)
+
+    def summary(self):
+        """Per span: calls and seconds in total, and p50/p95/max ms over the recent ones."""
+        spans, totals, counters = self._copy()
+        result = {}
+        for name in sorted(spans):
+            p50, p95 = np.percentile(spans[name], [50, 95]) * 1000
+            result[name] = {
+                'calls': totals[name][0],
+                'total_s': round(totals[name][1], 3),
+                'p50_ms': round(float(p50), 2),
+                'p95_ms': round(float(p95), 2),
+                'max_ms': round(float(spans[name].max()) * 1000, 2),
+            }
+        return {'spans': result, 'counters': dict(sorted(counters.items()))}
+
+    def prometheus(self):
+        """The store in Prometheus' text exposition format."""
+        spans, totals, counters = self._copy()
+        lines = [
+            '# HELP winni_span_seconds Time spent in each instrumented stage.',
+            '# TYPE winni_span_seconds summary',
+        ]
+        for name in sorted(spans):
+            label = f'span="{name}"'
+            for quantile in [0.5, 0.95]:
+                lines.append(f'winni_span_seconds{{{label},quantile="{quantile}"}} {np.quantile(spans[name], quantile):.6g}')
+            lines.append(f'winni_span_seconds_sum{{{label}}} {totals[name][1]:.6g}')
+            lines.append(f'winni_span_seconds_count{{{label}}} {totals[name][0]}')
+        lines += [
+            '# HELP winni_events_total Cache hits and misses, bytes read and written.',
+            '# TYPE winni_events_total counter',
+        ]
+        for name, value in sorted(counters.items()):
+            lines.append(f'winni_events_total{{event="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def json_lines(self):
+        """One JSON object per recent span timing, then one per counter."""
+        with self._lock:
+            events = [
+                {'type': 'span', 'name': name, 'time': round(end, 3), 'ms': round(seconds * 1000, 3)}
+                for name, recent in self.spans.items() for end, seconds in recent
+            ]
+            counters = dict(self.counters)
+        events.sort(key=lambda event: event['time'])
+        events += [{'type': 'counter', 'name': name, 'value': value} for name, value in sorted(counters.items())]
+        return ''.join(json.dumps(event) + '\n' for event in events)
+
+
+store = MetricsStore()
+
+
+class _Span:
+    __slots__ = ['name', 'start']
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        store.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """Time the ``with`` block under ``name``."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def count(name, n=1):
+    """Add ``n`` to the counter ``name``."""
+    if _enabled:
+        store.count(name, n)
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
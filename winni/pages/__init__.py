@@ -0,0 +1,36 @@
+"""
+The app's pages, one module each.
+
+``winni_st.py`` only imports the module for the page that is open, so a page's
+plotting and modeling libraries are loaded the first time someone visits it
+rather than on every cold start, and never for pages that don't use them.
+Modules stay in ``sys.modules`` between reruns, so each import is paid once
+per process.
+
+The Diagnostics page (timings and counters from ``winni.metrics``) isn't in
+the menu; open it by adding ``?diagnostics`` to the app's URL.
+"""
+
+import importlib
+
+from winni import metrics
+
+# menu label -> module under winni.pages
+PAGES = {
+    'Home': 'home',
+    'Show Me My Fish': 'show_fish',
+    'Where Should I Fish?': 'where_to_fish',
+    'Add Fish': 'add_fish',
+    'How Is My Data Clustered?': 'clustering',
+    'Additional Graphics': 'graphics',
+}
+# reachable by URL only
+HIDDEN_PAGES = {
+    'Diagnostics': 'diagnostics',
+}
+
+
+def render(page):
+    module = PAGES.get(page) or HIDDEN_PAGES[page]
+    with metrics.span(f'page.{module}'):
+        importlib.import_module(f'winni.pages.{module}').main()
@@ -0,0 +1,95 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from winni.cleaning import clean_reports
+from winni.ingest import import_reports
+from winni.pages.data import get_writer, load, weather_options
+from winni.schema import expand
+
+
+def main():
+    st.write("This section allows for you to add the fish you have caught, one fish at a time. Adding records where no fish were caught is equally important to this dataset!")
+
+    dataset, data_version, df, query = load()
+    fish_log = dataset.fish_log
+    today = datetime.date.today()
+    location = df['location'].unique()
+    weather = weather_options(df)
+    wind_directions = df['wind_dir'].unique()
+
+    with st.form(key='myform', clear_on_submit=True):
+        date = st.date_input('What is the Date You Fished?', today)
+        location_selector = st.selectbox("Where Did You Fish?", np.sort(location))
+        fish_type = st.selectbox('What Type of Fish Did You Catch?', ('Salmon', 'Rainbow', 'Lake Trout', 'Horned Pout', 'Smallmouth', 'No Fish Caught'))
+        fish_length = st.number_input('Length of Fish')
+        water_depth = st.number_input('Depth at Which You Caught the Fish')
+        time_caught = st.time_input('What Time Did You Catch the Fish?', datetime.time(7, 30))
+        weather_condition = st.selectbox("Select a Weather Condition", weather)
+        temperature = st.number_input('Air Temperature (F)')
+        water_temperature = st.number_input('Water Temperature (F)')
+        wind_dir_selector = st.selectbox('Select a Wind Direction', wind_directions)
+        wind_speed = st.number_input('Wind Speed (MPH)')
+        lines_in = st.time_input('What Time Did You Start Fishing?', datetime.time(7, 00))
+        lines_out = st.time_input('What Time Did You Stop Fishing?', datetime.time(11, 45))
+        
+        # entered the way the notebook records it, then cleaned with the notebook's rules
+        entry = {
+            'year': date.year,
+            'date': str(date),
+            'air_temp_f': temperature,
+            'water_temp_f': water_temperature,
+            'wind_speed_mph': wind_speed,
+            'wind_dir': wind_dir_selector,
+            'weather': weather_condition,
+            'location': location_selector,
+            'time': f'{time_caught.hour}:{time_caught.minute:02d}',
+            'fish_type': '' if fish_type == 'No Fish Caught' else fish_type,
+            'fish_length_in': fish_length,
+            'water_depth_ft': water_depth,
+            'skunked': fish_type == 'No Fish Caught',
+            'lines_in': f'{lines_in.hour}:{lines_in.minute:02d}',
+            'lines_out': f'{lines_out.hour}:{lines_out.minute:02d}',
+        }
+
+        # only the new record is written, and only when the form is submitted
+        if st.form_submit_button("Add Record"):
+            record, rejected = clean_reports(pd.DataFrame([entry]), reference=df)
+            if len(rejected):
+                st.error(f"Record not added: {rejected['reason'].iloc[0]}")
+            else:
+                # queued with other sessions' records and written as one segment
+                try:
+                    get_writer().append(record)
+                except Exception as e:
+                    # still conflicting after the retries, timed out, or the
+                    # bucket failed; a timed out batch may still be written
+                    st.error(f"Your record may not have been saved ({type(e).__name__}: {e}). "
+                             "Check the table below for it before adding it again.")
+                else:
+                    dataset.invalidate()
+
+        st.write(expand(dataset.get()))
+
+    # backfilling a whole notebook at once: one cleaned pass, one write
+    st.write("Have a season's worth of entries? Upload them as a CSV, in the same layout as `Winni Reports.csv` or the cleaned data.")
+    upload = st.file_uploader('Import Records From a CSV', type='csv')
+    if upload is not None and st.button('Import Records'):
+        try:
+            result = import_reports(fish_log, upload.getvalue(), reference=df)
+        except ValueError as e:
+            # missing columns, or not a CSV pandas can read (bad quoting,
+            # encoding); raised while cleaning, before anything is written
+            st.error(f'Nothing was imported: {e}')
+        except Exception as e:
+            # the bucket failed or timed out on the write; it may still have landed
+            st.error(f"The records may not have been saved ({type(e).__name__}: {e}). "
+                     "Reload the page and check the table above for them before importing the file again.")
+        else:
+            dataset.invalidate()
+            st.write(f'Imported **{result.rows} records** in {result.seconds:.2f}s ({result.rows / max(result.seconds, 1e-9):,.0f} rows/sec)')
+            if len(result.rejected):
+                st.write(f'**{len(result.rejected)} records** could not be imported:')
+                st.dataframe(result.rejected)
@@ -0,0 +1,112 @@
+import numpy as np
+import streamlit as st
+
+from winni.charts import cluster_scatter
+from winni.clustering import DBSCAN_GRID, KMEANS_GRID, ClusterService, KMeansStore
+from winni.features import FeatureMatrix, FeaturePipeline
+from winni.pages.data import get_chart_cache, get_dataset, load
+from winni.schema import TIME_COLUMNS
+
+
+# Fitted KMeans/DBSCAN results shared by every session, keyed by data version
+@st.experimental_singleton
+def get_cluster_service():
+    return ClusterService()
+
+
+# KMeans centroids saved next to the log and updated as fish are added
+@st.experimental_singleton
+def get_kmeans_store():
+    return KMeansStore(get_dataset().fish_log, get_cluster_service())
+
+
+def main():
+    dataset, data_version, df, query = load()
+    # clock times are stored as minutes, but aren't measurements to cluster on
+    numeric_cols = [col for col in df.select_dtypes(include=np.number).columns if col not in TIME_COLUMNS]
+
+    cluster_type = st.selectbox(
+        "Select Which Model to Cluster",
+        ('KMeans', 'DBScan')
+    )
+
+    numeric_col1 = st.selectbox(
+        "Select Field 1 to Analyze",
+        numeric_cols,
+        index=numeric_cols.index('water_temp_f')
+        )
+
+    numeric_col2 = st.selectbox(
+        "Select Field 2 to Analyze",
+        [i for i in numeric_cols if i != numeric_col1],
+        index=[i for i in numeric_cols if i != numeric_col1].index('fish_length_in')
+        )
+
+    # Model Prep - dummies + standard scaling, built once per data version
+    # and extended in place of a rebuild when records are added
+    pipeline = FeaturePipeline.load()
+    features = dataset.derived(
+        'features',
+        lambda data: FeatureMatrix(pipeline, data),
+        update=lambda previous, data: previous.extend(data),
+    )
+    X_scaled = features.scaled
+
+    cluster_service = get_cluster_service()
+
+    # df is shared between sessions, so cluster labels go on a copy of just
+    # the columns the averages table shows
+    cluster_data = df[numeric_cols + ['skunked']].copy()
+
+    if cluster_type == 'KMeans':
+
+        num_clusters = st.slider('How Many Clusters?', 2, 5, 3, 1)
+
+        # fit, in the background, only the cluster counts whose saved
+        # centroids are missing or have drifted too far to keep updating
+        columns = [numeric_col1, numeric_col2]
+        X_pair = df[columns].to_numpy(dtype=float)
+        cluster_service.prefetch('kmeans', X_pair, data_version, columns, get_kmeans_store().stale(X_pair, columns, KMEANS_GRID))
+
+        def run_kmeans(df, n_clusters=3):
+            kmeans = get_kmeans_store().get(X_pair, data_version, columns, n_clusters)
+
+            df['cluster'] = kmeans.labels + 1
+
+            st.write(f'Inertia: {kmeans.inertia:,.1f}, silhouette score: {kmeans.silhouette:.3f}')
+
+            # scatter with annotated centroids, built once per fit
+            return get_chart_cache().get('kmeans', data_version, (columns, n_clusters, kmeans.inertia), lambda: cluster_scatter(
+                df[numeric_col1], df[numeric_col2], df['cluster'], numeric_col1, numeric_col2, centers=kmeans.centers))
+
+        st.vega_lite_chart(run_kmeans(cluster_data, n_clusters=num_clusters))
+
+        st.write('Averages by KMeans Cluster')
+        cluster_df = cluster_data.groupby('cluster').mean().T
+        st.dataframe(cluster_df)
+
+    elif cluster_type == 'DBScan':
+
+        eps_select = st.slider('What value of Epsilon do you want to use?', .2, 2.0, .6, .2)
+        min_samples_select = st.slider('How many Samples do you want to use?', 5, 8, 5, 1)
+
+        # fit the whole eps/min_samples grid in the background
+        cluster_service.prefetch('dbscan', X_scaled, data_version, features.pipeline.columns, DBSCAN_GRID)
+
+        def run_dbscan(df):
+            params = dict(eps=round(eps_select, 1), min_samples=min_samples_select)
+            dbscan = cluster_service.get('dbscan', X_scaled, data_version, features.pipeline.columns, **params)
+
+            df['cluster'] = dbscan.labels + 2
+
+            if dbscan.silhouette is not None:
+                st.write(f'Silhouette score: {dbscan.silhouette:.3f}')
+
+            return get_chart_cache().get('dbscan', data_version, (numeric_col1, numeric_col2, params), lambda: cluster_scatter(
+                df[numeric_col1], df[numeric_col2], df['cluster'], numeric_col1, numeric_col2))
+
+        st.vega_lite_chart(run_dbscan(cluster_data))
+
+        st.write('Averages by DBSCAN Cluster')
+        cluster_df = cluster_data.groupby('cluster').mean().T
+        st.dataframe(cluster_df)
@@ -0,0 +1,91 @@
+"""
+The fishing log and storage client shared by the pages.
+
+Nothing here touches the network at import time: the storage client is made
+the first time a page asks for the log, once per process, and pages that
+don't show data (Home, Additional Graphics) never download it.
+
+Set ``WINNI_DATA_DIR`` to a directory holding ``winni_reports.csv`` to run the
+app against local files instead of the bucket (offline work, benchmarks).
+
+The app reads and writes the log as a typed Arrow snapshot,
+``winni_reports.arrow``.  If the bucket (or folder) only has the CSV log, the
+snapshot is made from it the first time a page loads the data; the CSV is left
+as it was, so every app instance should be moved over at once.
+"""
+
+import os
+
+import streamlit as st
+
+from winni.cache import DatasetCache
+from winni.charts import ChartCache
+from winni.exports import ExportCache
+from winni.query import FishQuery
+from winni.schema import compact
+from winni.storage import FishLog, GCSBackend, LocalBackend, migrate
+from winni.writes import WriteCoordinator
+
+BUCKET_NAME = 'winni-data-bucket'
+FILE_PATH = 'winni_reports.arrow'
+# the CSV log the snapshot was first made from
+CSV_PATH = 'winni_reports.csv'
+DATA_DIR = os.environ.get('WINNI_DATA_DIR')
+
+sidebar = st.sidebar
+
+
+# Create API client, once per process
+@st.experimental_singleton
+def get_client():
+    from google.cloud import storage
+    from google.oauth2 import service_account
+
+    credentials = service_account.Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"]
+    )
+    return storage.Client(credentials=credentials)
+
+
+# Shared by every session (one compact, read-only frame); only re-downloads
+# when the log's version changes
+@st.experimental_singleton
+def get_dataset(bucket_name=BUCKET_NAME, file_path=FILE_PATH):
+    # base snapshot plus small append segments written by "Add Fish"
+    if DATA_DIR:
+        backend = LocalBackend(DATA_DIR)
+    else:
+        backend = GCSBackend(get_client().bucket(bucket_name))
+    migrate(backend, CSV_PATH, file_path)
+    return DatasetCache(FishLog(backend, file_path), prepare=compact)
+
+
+# "Add Fish" records from every session go through one writer, batched
+@st.experimental_singleton
+def get_writer():
+    return WriteCoordinator(get_dataset().fish_log)
+
+
+# Chart specs shared by every session, keyed by data version and filters
+@st.experimental_singleton
+def get_chart_cache():
+    return ChartCache()
+
+
+# Finished downloads shared by every session, keyed by data version, filters and format
+@st.experimental_singleton
+def get_exports():
+    return ExportCache()
+
+
+def load():
+    """``(dataset, data_version, df, query)`` for the current log."""
+    dataset = get_dataset()
+    data_version, df = dataset.snapshot()
+    # filter index and count cube, rebuilt only when the data changes
+    query = dataset.derived('query', FishQuery, update=lambda previous, data: previous.extend(data))
+    return dataset, data_version, df, query
+
+
+def weather_options(df):
+    return [str(x) for x in df['weather'].unique() if x != 'no_weather_recorded']
@@ -0,0 +1,43 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from winni import metrics
+from winni.pages.data import get_chart_cache, get_dataset, get_exports
+from winni.registry import ModelRegistry
+
+
+def main():
+    st.write("""Where the app's time goes: the storage download and parse, filters, feature encoding,
+    cluster fits and chart builds, with cache hits and misses and bytes moved. Numbers are for this
+    server process, over the last few hundred calls of each stage.""")
+
+    collecting = st.checkbox('Collect timings', value=metrics.enabled(),
+                             help='Off by default; set WINNI_METRICS=1 to collect from startup')
+    if collecting != metrics.enabled():
+        metrics.enable(collecting)
+
+    summary = metrics.store.summary()
+    if summary['spans']:
+        st.dataframe(pd.DataFrame(summary['spans']).T.sort_values('total_s', ascending=False))
+    else:
+        st.write('Nothing timed yet.')
+    if summary['counters']:
+        st.dataframe(pd.Series(summary['counters'], name='count'))
+
+    # load counters only; opening this page doesn't download the log
+    with st.expander('Data load metrics'):
+        st.json(get_dataset().metrics())
+    with st.expander('Chart cache'):
+        st.json(get_chart_cache().metrics())
+    with st.expander('Download cache'):
+        st.json(get_exports().metrics())
+    with st.expander('Skunk model'):
+        st.json(ModelRegistry().metadata('skunk') or {'path': 'model_data/skunk_model.npz', 'registry': 'empty'})
+
+    now = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    st.download_button('Download as Prometheus text', metrics.store.prometheus(), f'winni_metrics_{now}.prom', 'text/plain')
+    st.download_button('Download as JSON lines', metrics.store.json_lines(), f'winni_metrics_{now}.jsonl', 'application/x-ndjson')
+    if st.button('Reset'):
+        metrics.store.reset()
@@ -0,0 +1,11 @@
+import streamlit as st
+
+
+def main():
+    st.write("""Remember how you wrote down all of those entries into your book? Well here they are! 
+    If you want to see all of the fish you've caught by location or weather condition,
+    click on **"Show Me My Fish"**. \n\n Alternatively, if you'd like to know where to fish based on tomorrow's 
+    weather conditions, then click the **"Where Should I Fish?"**. \n\n Even cooler, as you catch fish, you can add them to this website and the data will be
+    reflective of your newly caught fish! Just click on **"Add Fish"** to access this part. \n\n Now, this website wouldn't be complete without some
+    modeling... so if you'd like to see how your data is clustered (think "dividing the population or data points into a number of groups such that data points in the same groups are
+    more similar to other data points in the same group and dissimilar to the data points in other groups"), then click on the **"How Does My Data Cluster?"**.""")
@@ -0,0 +1,112 @@
+import datetime
+
+import numpy as np
+import streamlit as st
+
+from winni.charts import MONTHS, month_chart, pie_chart
+from winni.exports import FORMATS, export_bytes
+from winni.pages.data import get_chart_cache, get_exports, load, sidebar
+from winni.schema import expand
+
+
+def main():
+    st.text("""
+    This page shows you a history of all of the records from your notebook! Each record 
+    in the table is an entry from the notebook; however, that doesn't mean one entry per 
+    day... each fish is it's own entry as the data is different for that particular 
+    fish (fish type, length, depth caught, etc.) 
+
+    Filtering the selections on the left will shrink the table and graphs below to only 
+    records that match the selections you choose. Have fun!
+    """)
+
+    dataset, data_version, df, query = load()
+    today = datetime.date.today()
+    location = df['location'].unique()
+
+    location_selector = sidebar.selectbox(
+        "Select a Location",
+        np.sort(location)
+    )
+
+    # get list of all weather conditions that have occurred in selected location
+    weather = np.sort([str(x) for x in query.unique('weather', location=location_selector) if x != 'no_weather_recorded'])[::-1]
+
+    weather_selector = sidebar.selectbox(
+        "Select a Weather Condition",
+        weather
+    )
+
+    # temperature sliders
+    temp = sidebar.slider('Select a Temperature', 35, 90, 70, 1)
+    temp_plus_minus = sidebar.slider("Plus or Minus Degrees", 0, 30, 30, 1)
+
+    # wind sliders
+    wind = sidebar.slider('Select a Wind Speed', 0, 20, 7, 1)
+    wind_plus_minus = sidebar.slider("Plus or Minus Windspeed MPH", 0, 30, 30, 1)
+
+    filters = dict(
+        location=location_selector,
+        weather=weather_selector,
+        wind_speed_mph=(wind - wind_plus_minus, wind + wind_plus_minus),
+        air_temp_f=(temp - temp_plus_minus, temp + temp_plus_minus),
+    )
+    df_weather = query.filter(**filters)
+
+    # Reporting about selected location 
+    st.write(f"**Weather Conditions: {weather_selector.title()}, {temp}&deg;, {wind} mph winds** for **{location_selector.title()}**")
+    if df_weather.shape[0] > 1:
+        st.write(f'This location has **{df_weather.shape[0]} records** with these weather conditions')
+    else:
+        st.write(f'This location has **{df_weather.shape[0]} record** with these weather conditions')
+    st.write(f"Under these weather conditions, this location was last fished on **{df_weather['date'].dt.date.max()}**")
+
+    st.dataframe(expand(df_weather))
+    st.write(f'{len(df_weather)} records')
+
+    # Downloads are only built when asked for, then kept for every session
+    # until the data changes
+    exports = get_exports()
+    file_format = st.selectbox('Download format', list(FORMATS))
+    mime, extension = FORMATS[file_format]
+
+    def download(label, name, table_filters, file_name):
+        key = (data_version, file_format, tuple(sorted(table_filters.items())))
+        if exports.cached(key) is None and not st.button(f'Prepare {label}', key=f'prepare-{name}'):
+            return
+        rows = query.select(**table_filters) if table_filters else None
+        data = exports.get(key, lambda: export_bytes(df, rows, file_format))
+        st.download_button(f'Click to download {label}', data, file_name, mime, key=f'download-{name}')
+
+    download('filtered table', 'filtered', filters, f'winni_data_{location_selector}_{today}.{extension}')
+    download('table with all records', 'all', {}, f'winni_data_{today}.{extension}')
+
+    st.markdown("""---""")
+
+    # Pie Chart and Table associated with chart
+    share = query.fish_type_share(**filters)
+    pie = share.to_frame('Percent_Caught')
+    pie.index = pie.index.map(lambda x: x.title())
+
+    # creates pie-chart based on user selections, reused until the data or
+    # the filters change
+    charts = get_chart_cache()
+    title = [f'Fish Caught {location_selector.title()}:', f'{weather_selector.title()} Weather Conditions']
+    st.vega_lite_chart(charts.get('fish_type_share', data_version, filters, lambda: pie_chart(share, title)))
+
+    # Display pie-chart table
+    st.dataframe(pie)
+
+    st.markdown("""---""") 
+
+    ## Bar Chart and Table associated with chart
+    # creates bar-chart based on user selections
+    chart = query.month_counts(**filters)
+    chart_month = chart.copy()
+    chart_month['Month'] = chart_month['Month'].map(MONTHS)
+
+    st.markdown("<h6 style='text-align: center; color: black;'>Times Fished vs. Times Skunked</h6>", unsafe_allow_html=True)
+    st.vega_lite_chart(charts.get('month_counts', data_version, filters, lambda: month_chart(chart)), use_container_width=True)
+
+    # Display bar-chart table
+    st.dataframe(chart_month)
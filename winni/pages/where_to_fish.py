@@ -0,0 +1,82 @@
+import datetime
+
+import streamlit as st
+
+from winni.charts import location_bars
+from winni.pages.data import get_chart_cache, load, sidebar, weather_options
+from winni.recommend import get_model
+from winni.schema import expand
+
+
+def main():
+    st.text("""
+    This page helps to show you where to fish based on the weather conditions you 
+    select. It will filter the table and graphs to show you those records that match 
+    where you have fished previously under the selected conditions, and the graphs will 
+    show you where the best places have been with these weather conditions.
+    """)
+
+    dataset, data_version, df, query = load()
+    today = datetime.date.today()
+    weather = weather_options(df)
+    wind_directions = df['wind_dir'].unique()
+
+    # create sidebar with weather dropdown
+    weather_condition = sidebar.selectbox(
+        "Select a Weather Condition",
+        weather
+    )
+
+    # create dropdown with wind direction
+    wind_dir_selector = sidebar.selectbox(
+        'Select a Wind Direction',
+        wind_directions
+    )
+
+    # temperature sliders
+    temp = sidebar.slider('Select a Temperature', 35, 90, 70, 1)
+    temp_plus_minus = sidebar.slider("Plus or Minus Degrees", 0, 30, 30, 1)
+
+    # wind sliders
+    wind = sidebar.slider('Select a Wind Speed', 0, 20, 7, 1)
+    wind_plus_minus = sidebar.slider("Plus or Minus Windspeed MPH", 0, 30, 30, 1)
+
+    filters = dict(
+        weather=weather_condition,
+        wind_dir=wind_dir_selector,
+        wind_speed_mph=(wind - wind_plus_minus, wind + wind_plus_minus),
+        air_temp_f=(temp - temp_plus_minus, temp + temp_plus_minus),
+    )
+    df_weather = query.filter(**filters)
+
+    st.dataframe(expand(df_weather))
+    st.write(f'{len(df_weather)} records')
+
+    # Chance of getting skunked in each area, from the classification model
+    this_month = df[df['month'] == today.month]
+    water_temp = (this_month if len(this_month) else df)['water_temp_f'].median()
+    skunk_chances = get_model().score_locations(
+        weather=weather_condition,
+        wind_dir=wind_dir_selector,
+        air_temp_f=temp,
+        wind_speed_mph=wind,
+        water_temp_f=water_temp,
+        month=today.month,
+    )
+    st.write(f"**Best bets for these conditions** (assuming {water_temp:.1f}&deg; water, typical for this month)")
+    st.dataframe(skunk_chances.rename(columns={'general_loc': 'Area', 'skunk_probability': 'Chance of Getting Skunked'})
+                 .style.format({'Chance of Getting Skunked': '{:.0%}'}))
+
+    # Distribution of Locations Fished, and fish caught by location; the
+    # specs are reused until the data or the filters change
+    charts = get_chart_cache()
+    days_fished_bc = charts.get('days_fished', data_version, filters, lambda: location_bars(
+        query.days_fished(**filters), '# of Days Fished', 'Days Fished by Location'))
+    st.vega_lite_chart(days_fished_bc)
+
+    # Bar Chart - Fish Caught by Location
+    fish_caught = query.fish_caught(**filters)
+    bar_chart = charts.get('fish_caught', data_version, filters, lambda: location_bars(
+        fish_caught, '# of Fish Caught', 'Fish Caught by Location'))
+    st.vega_lite_chart(bar_chart)
+    st.write(fish_caught.head(10))
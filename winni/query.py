@@ -0,0 +1,234 @@
+"""
+Precomputed filters and rollups for the "Show Me My Fish" and
+"Where Should I Fish?" pages.
+
+Both pages filter on equality of ``location``/``weather``/``wind_dir`` and on
+inclusive ranges of ``air_temp_f``/``wind_speed_mph``, then count fish by
+type, month and location.  ``FishQuery`` is built once per data version and
+keeps, for the raw rows and for the trips below:
+
+* the sorted row positions holding each category value, so equality filters
+  are intersections of sorted lists (binary searches of the shorter list's
+  positions in the longer one, or a bitmap when both are long), and
+* each range column sorted, so a range is two binary searches; ranges that
+  cover every row (the sliders' default) cost nothing, and the rows an
+  equality filter or a narrower range kept are checked directly.
+
+A selective filter costs time in proportion to the rows it touches rather
+than the size of the log; only filters matching a good share of the log pay
+for a pass over every row.
+
+The chart helpers answer from the trip summary (``winni.trips``, one row per
+day fished at a location under one set of conditions) instead of the raw
+rows, summing its record, fish, skunk and fish type counts.  They return
+exactly what the pages used to compute with pandas.  ``extend`` carries the
+trip summary over to the next version of the log, so only appended rows are
+summarized again.
+"""
+
+import numpy as np
+import pandas as pd
+
+from winni import metrics
+from winni.trips import COUNT_COLUMNS, TripSummary
+
+CATEGORY_COLUMNS = ['location', 'weather', 'wind_dir']
+RANGE_COLUMNS = ['air_temp_f', 'wind_speed_mph']
+FILTER_COLUMNS = CATEGORY_COLUMNS + RANGE_COLUMNS
+
+EMPTY = np.array([], dtype=np.int64)
+
+
+class _ColumnIndex:
+    """Row postings per category value and sorted copies of the range columns."""
+
+    def __init__(self, frame):
+        self.n = len(frame)
+        self.postings = {}
+        for col in CATEGORY_COLUMNS:
+            codes, uniques = _sorted_codes(frame[col], sort=False)
+            # small codes get numpy's radix sort rather than a merge sort
+            codes = codes.astype(np.min_scalar_type(len(uniques)))
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.postings[col] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+            }
+
+        self.values, self.order, self.sorted = {}, {}, {}
+        for col in RANGE_COLUMNS:
+            values = frame[col].to_numpy(dtype=float)
+            order = np.argsort(values, kind='stable')
+            self.values[col] = values
+            self.order[col] = order
+            self.sorted[col] = values[order]
+
+    def select(self, equals, ranges):
+        """Ascending positions of the rows matching every filter."""
+        rows = None
+        # most selective postings first keeps the intersections small
+        hits = sorted((self.postings[col].get(value, EMPTY) for col, value in equals.items()), key=len)
+        for hit in hits:
+            rows = hit if rows is None else _intersect(rows, hit, self.n)
+
+        spans = []
+        for col, (low, high) in ranges.items():
+            ordered = self.sorted[col]
+            start = np.searchsorted(ordered, low, side='left')
+            stop = np.searchsorted(ordered, high, side='right')
+            if start == 0 and stop == self.n:
+                continue
+            spans.append((stop - start, col, start, stop, low, high))
+
+        # narrowest range first, then the others only look at what it kept
+        for _, col, start, stop, low, high in sorted(spans, key=lambda span: span[0]):
+            if rows is None:
+                rows = _ascending(self.order[col][start:stop], self.n)
+            else:
+                values = self.values[col][rows]
+                rows = rows[(values >= low) & (values <= high)]
+
+        if rows is None:
+            return np.arange(self.n)
+        return rows
+
+
+def _intersect(small, large, n):
+    """Positions in both sorted ``small`` and ``large``, out of ``n`` rows."""
+    if len(small) > len(large):
+        small, large = large, small
+    if not len(small):
+        return EMPTY
+    # a binary search costs about ten times marking a row in a bitmap (and
+    # the bitmap has to be cleared first), so only short lists are looked up
+    if len(small) * 64 < n + 8 * len(large):
+        at = np.minimum(np.searchsorted(large, small), len(large) - 1)
+        return small[large[at] == small]
+    member = np.zeros(n, dtype=bool)
+    member[large] = True
+    return small[member[small]]
+
+
+def _ascending(positions, n):
+    """``positions`` (distinct, each below ``n``) sorted."""
+    if len(positions) < n // 4:
+        return np.sort(positions)
+    # past about a quarter of the rows, marking a bitmap beats sorting
+    member = np.zeros(n, dtype=bool)
+    member[positions] = True
+    return np.flatnonzero(member)
+
+
+def _sorted_codes(values, sort=True):
+    """Codes into the (sorted) distinct values; missing values get the last code."""
+    codes, uniques = pd.factorize(values, sort=sort)
+    codes = np.where(codes < 0, len(uniques), codes)
+    return codes, uniques
+
+
+class FishQuery:
+    """Filter index and count cubes over one version of the fishing log."""
+
+    def __init__(self, df, trip_summary=None):
+        self.df = df
+        self.rows = _ColumnIndex(df)
+        self.trip_summary = trip_summary if trip_summary is not None else TripSummary(df)
+        self.trips = self.trip_summary.table
+        self.trip_rows = _ColumnIndex(self.trips)
+
+        # records, fish and skunks per trip, and records per fish type
+        self.records, self.fish, self.skunked = (self.trips[col].to_numpy(dtype=np.int64) for col in COUNT_COLUMNS)
+        types = self.trip_summary.types.sort_index(axis=1)
+        self.type_counts = types.to_numpy(dtype=np.int64)
+        self.type_names = pd.Index(types.columns, name='fish_type')
+        self.codes = {col: _sorted_codes(self.trips[col]) for col in ['month', 'location']}
+
+        # number the (location, date) pairs; several condition rows can share one
+        locations, self.location_names = self.codes['location']
+        dates, unique_dates = pd.factorize(self.trips['date'])
+        self.trip_pair, unique_pairs = pd.factorize(locations * (len(unique_dates) + 1) + dates + 1)
+        self.pair_location = unique_pairs // (len(unique_dates) + 1)
+        self.pair_dated = unique_pairs % (len(unique_dates) + 1) > 0
+
+    def extend(self, df):
+        """The query for ``df``, a later version of the same log, carrying the trip summary over."""
+        return FishQuery(df, self.trip_summary.extend(df))
+
+    @staticmethod
+    def _filters(location=None, weather=None, wind_dir=None, air_temp_f=None, wind_speed_mph=None):
+        equals = {
+            col: value
+            for col, value in [('location', location), ('weather', weather), ('wind_dir', wind_dir)]
+            if value is not None
+        }
+        ranges = {
+            col: bounds
+            for col, bounds in [('air_temp_f', air_temp_f), ('wind_speed_mph', wind_speed_mph)]
+            if bounds is not None
+        }
+        return equals, ranges
+
+    def select(self, **filters):
+        """
+        Row positions in ``df`` matching the filters.
+
+        Filters are ``location``, ``weather`` and ``wind_dir`` (equality) and
+        ``air_temp_f`` and ``wind_speed_mph`` as inclusive ``(low, high)``
+        tuples, the same as ``Series.between``.  Omitted filters match
+        everything.
+        """
+        with metrics.span('query.select'):
+            return self.rows.select(*self._filters(**filters))
+
+    def filter(self, **filters):
+        """The matching rows of ``df``, in their original order."""
+        return self.df.iloc[self.select(**filters)]
+
+    def unique(self, col, **filters):
+        """Distinct values of ``col`` among the matching rows, in order of appearance."""
+        return pd.unique(self.df[col].to_numpy()[self.select(**filters)])
+
+    def _rollup(self, col, trip_rows, weights):
+        """Sum ``weights`` over trips per value of ``col``, keeping non-empty groups."""
+        codes, uniques = self.codes[col]
+        totals = np.bincount(codes[trip_rows], weights=weights[trip_rows], minlength=len(uniques) + 1)
+        present = np.bincount(codes[trip_rows], minlength=len(uniques) + 1)[:len(uniques)] > 0
+        return pd.Series(totals[:len(uniques)][present].astype(np.int64), index=pd.Index(uniques[present], name=col))
+
+    def fish_type_share(self, **filters):
+        """
+        Share of matching records per fish type, highest first.
+
+        Same as ``df_weather.value_counts(['fish_type'], normalize=True)``.
+        """
+        trip_rows = self.trip_rows.select(*self._filters(**filters))
+        counts = pd.Series(self.type_counts[trip_rows].sum(axis=0), index=self.type_names)
+        counts = counts[counts > 0].sort_values(ascending=False)
+        return counts / counts.sum()
+
+    def month_counts(self, **filters):
+        """Times fished and times skunked per month, as the "Show Me My Fish" bar chart."""
+        trip_rows = self.trip_rows.select(*self._filters(**filters))
+        chart = pd.DataFrame({
+            'Times Fished': self._rollup('month', trip_rows, self.records),
+            'Skunked': self._rollup('month', trip_rows, self.skunked),
+        })
+        return chart.rename_axis('Month').reset_index()
+
+    def days_fished(self, **filters):
+        """Distinct dates fished per location, most first."""
+        trip_rows = self.trip_rows.select(*self._filters(**filters))
+        fished = np.zeros(len(self.pair_location), dtype=bool)
+        fished[self.trip_pair[trip_rows]] = True
+        fished &= self.pair_dated
+        days = np.bincount(self.pair_location[fished], minlength=len(self.location_names) + 1)
+        days = pd.Series(days[:len(self.location_names)], index=pd.Index(self.location_names, name='location'))
+        days = days[days > 0].sort_values(ascending=False)
+        return days.to_frame('# of Days Fished').reset_index()
+
+    def fish_caught(self, **filters):
+        """Fish caught (records other than ``no_fish_caught``) per location, most first."""
+        trip_rows = self.trip_rows.select(*self._filters(**filters))
+        caught = self._rollup('location', trip_rows, self.fish)
+        caught = caught[caught > 0]
+        return caught.sort_values(ascending=False).to_frame('# of Fish Caught').reset_index()
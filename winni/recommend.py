@@ -0,0 +1,223 @@
+"""
+Skunk-probability scoring for the "Where Should I Fish?" page.
+
+The classifier is the one from ``classification_model.ipynb``: the weather,
+wind, temperature, month and area columns expanded with
+``PolynomialFeatures(2)``, standardized, reduced with ``PCA(.95)`` and fed to
+AdaBoost over random forests.  ``export_model`` fits that pipeline and saves
+it as plain numpy arrays in ``model_data/skunk_model.npz``:
+
+* the scaler and PCA are folded into one affine map applied after the
+  polynomial expansion, and
+* every tree of every forest is flattened into shared node arrays (children,
+  split feature, threshold and the class-1 share of each leaf),
+
+so ``SkunkModel`` loads without sklearn or unpickling and scores a batch of
+rows by walking all trees at once.  ``score_locations`` scores every area for
+one set of conditions in a single call.
+
+Models tuned by ``python -m winni.training`` are saved in the same format to
+the ``ModelRegistry``; ``get_model`` loads the newest of those, if any.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from winni import metrics
+from winni.features import FeaturePipeline
+from winni.registry import ModelRegistry
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'model_data', 'skunk_model.npz')
+
+# the notebook's X: what's left of the log once the outcome columns are dropped
+NUMERIC_COLUMNS = ['air_temp_f', 'water_temp_f', 'wind_speed_mph', 'month']
+CATEGORY_COLUMNS = ['wind_dir', 'weather', 'general_loc']
+
+
+def _poly2(X):
+    """``PolynomialFeatures(degree=2).fit_transform(X)``, same column order."""
+    i, j = np.triu_indices(X.shape[1])
+    return np.hstack([np.ones((len(X), 1)), X, X[:, i] * X[:, j]])
+
+
+def train_model(df, random_state=42):
+    """
+    Fit the notebook's pipeline on ``df`` and return
+    ``(pipeline, scaler, pca, ada)``.
+    """
+    from sklearn.decomposition import PCA
+    from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    pipeline = FeaturePipeline.from_frame(df, CATEGORY_COLUMNS, NUMERIC_COLUMNS)
+    X = _poly2(pipeline.encode(df).astype(np.float64))
+    y = df['skunked'].astype(str).eq('True').astype(int).to_numpy()
+    X_train, _, y_train, _ = train_test_split(X, y, random_state=random_state)
+
+    scaler = StandardScaler().fit(X_train)
+    pca = PCA(svd_solver='full', n_components=.95).fit(scaler.transform(X_train))
+    forest = RandomForestClassifier(n_estimators=20, max_depth=13, max_features=5, min_samples_split=2, random_state=random_state)
+    # positional so it is base_estimator on the pinned sklearn and estimator on newer ones
+    ada = AdaBoostClassifier(forest, random_state=random_state)
+    ada.fit(pca.transform(scaler.transform(X_train)), y_train)
+    return pipeline, scaler, pca, ada
+
+
+def export_model(pipeline, scaler, pca, ada, path=MODEL_PATH):
+    """Save a fitted pipeline from ``train_model`` as ``SkunkModel`` arrays."""
+    # PCA(StandardScaler(x)) == x @ weights + bias
+    weights = pca.components_.T / scaler.scale_[:, np.newaxis]
+    bias = -(scaler.mean_ / scaler.scale_) @ pca.components_.T - pca.mean_ @ pca.components_.T
+
+    children, feature, threshold, value, roots = [], [], [], [], []
+    offset = 0
+    for forest in ada.estimators_:
+        for tree in forest.estimators_:
+            t = tree.tree_
+            nodes = np.arange(t.node_count)
+            leaf = t.children_left == -1
+            # [right, left] so a node's next node is children[node, x <= threshold];
+            # leaves point at themselves so every row can take the same number of steps
+            children.append(np.stack([
+                np.where(leaf, nodes, t.children_right),
+                np.where(leaf, nodes, t.children_left),
+            ], axis=1) + offset)
+            feature.append(np.where(leaf, 0, t.feature))
+            # the largest float32 not above each threshold gives the same float32 comparisons
+            down = t.threshold.astype(np.float32)
+            threshold.append(np.where(down > t.threshold, np.nextafter(down, np.float32(-np.inf)), down))
+            counts = t.value[:, 0, :]
+            value.append(counts[:, 1] / counts.sum(axis=1))
+            roots.append(offset)
+            offset += t.node_count
+
+    spec = {
+        'numeric_columns': pipeline.numeric_columns,
+        'vocabulary': pipeline.vocabulary,
+        # newer sklearn only has the discrete SAMME combination
+        'algorithm': 'SAMME.R' if getattr(ada, 'algorithm', None) == 'SAMME.R' else 'SAMME',
+        'max_depth': max(tree.tree_.max_depth for forest in ada.estimators_ for tree in forest.estimators_),
+    }
+    np.savez(
+        path,
+        spec=np.array(json.dumps(spec)),
+        weights=weights,
+        bias=bias,
+        children=np.concatenate(children).astype(np.int32),
+        feature=np.concatenate(feature).astype(np.int16),
+        threshold=np.concatenate(threshold),
+        value=np.concatenate(value).astype(np.float32),
+        roots=np.array(roots, dtype=np.int32),
+        trees_per_estimator=np.array(len(ada.estimators_[0].estimators_)),
+        estimator_weights=ada.estimator_weights_[:len(ada.estimators_)],
+        weight_total=np.array(ada.estimator_weights_.sum()),
+    )
+
+
+class SkunkModel:
+    """The exported classifier, scored with numpy only."""
+
+    def __init__(self, arrays):
+        spec = json.loads(str(arrays['spec']))
+        self.pipeline = FeaturePipeline(spec['vocabulary'], spec['numeric_columns'])
+        self.algorithm = spec['algorithm']
+        self.max_depth = spec['max_depth']
+        for name in ['weights', 'bias', 'children', 'feature', 'threshold', 'value', 'roots', 'estimator_weights']:
+            setattr(self, name, arrays[name])
+        self.trees_per_estimator = int(arrays['trees_per_estimator'])
+        self.weight_total = float(arrays['weight_total'])
+        self._column_index = {name: i for i, name in enumerate(self.pipeline.columns)}
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    @property
+    def locations(self):
+        return self.pipeline.vocabulary['general_loc']
+
+    def transform(self, X):
+        """The PCA components the trees split on, from encoded rows ``X``."""
+        Z = _poly2(X.astype(np.float64)) @ self.weights + self.bias
+        # sklearn's trees compare float32 inputs, as the thresholds are stored
+        return Z.astype(np.float32)
+
+    def _proba(self, X):
+        Z = self.transform(X)
+        n = len(Z)
+        # walk every tree for every row at once, one level per step, indexing
+        # the transposed components so each lookup is a single flat gather
+        flat = np.ascontiguousarray(Z.T).ravel()
+        rows = np.arange(n)
+        node = np.repeat(self.roots[:, np.newaxis], n, axis=1)
+        for _ in range(self.max_depth):
+            go_left = flat[self.feature[node] * n + rows] <= self.threshold[node]
+            node = self.children[node, go_left.view(np.int8)]
+
+        # each forest's probability is the mean of its trees' leaf shares
+        share = self.value[node].reshape(-1, self.trees_per_estimator, n).mean(axis=1, dtype=np.float64)
+        if self.algorithm == 'SAMME.R':
+            eps = np.finfo(np.float64).eps
+            log_odds = np.log(np.maximum(share, eps)) - np.log(np.maximum(1 - share, eps))
+            decision = log_odds.sum(axis=0) / self.weight_total
+        else:
+            votes = np.where(share > 0.5, 1.0, -1.0)
+            decision = 2 * (self.estimator_weights[:, np.newaxis] * votes).sum(axis=0) / self.weight_total
+        return 1 / (1 + np.exp(-decision))
+
+    def predict_proba(self, df):
+        """Probability of getting skunked for each row of ``df``."""
+        return self._proba(self.pipeline.encode(df))
+
+    def score_locations(self, weather, wind_dir, air_temp_f, wind_speed_mph, water_temp_f, month):
+        """
+        Skunk probability for every area under one set of conditions, lowest
+        (best) first.
+        """
+        # the rows only differ by area, so fill the encoded matrix directly
+        # instead of building and encoding a frame
+        columns = self._column_index
+        X = np.zeros((len(self.locations), len(columns)), dtype=np.float32)
+        for col, value in zip(NUMERIC_COLUMNS, [air_temp_f, water_temp_f, wind_speed_mph, month]):
+            X[:, columns[col]] = value
+        for col, value in [('wind_dir', wind_dir), ('weather', weather)]:
+            if f'{col}_{value}' in columns:
+                X[:, columns[f'{col}_{value}']] = 1
+        for row, value in enumerate(self.locations[1:], start=1):
+            X[row, columns[f'general_loc_{value}']] = 1
+
+        with metrics.span('model.score'):
+            proba = self._proba(X)
+        scores = pd.DataFrame({'general_loc': self.locations, 'skunk_probability': proba})
+        return scores.sort_values('skunk_probability', kind='mergesort').reset_index(drop=True)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model(path=None):
+    """
+    The model at ``path``, else the newest skunk model in the registry, else
+    the exported one; loaded on first use and shared by the process.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = SkunkModel.load(path or ModelRegistry().path('skunk', filename='model.npz') or MODEL_PATH)
+    return _model
+
+
+if __name__ == '__main__':
+    from winni.snapshot import read_snapshot
+
+    data = read_snapshot(os.path.join(os.path.dirname(MODEL_PATH), 'winni_reports.arrow'))
+    export_model(*train_model(data))
+    print(f'wrote {os.path.normpath(MODEL_PATH)}')
@@ -0,0 +1,82 @@
+"""
+Versioned model artifacts on local disk.
+
+``python -m winni.training`` saves each model it trains as a new version in
+``model_data/registry/<name>/v<N>/``.  Each version has the model's files,
+plus a ``metadata.json`` holding the hash of the data it was trained on, its
+cross-validation and hold-out metrics, the winning parameters, the feature
+vocabulary and how long the search took.  Versions are never overwritten.
+The app loads the newest version of the skunk model, and falls back to
+``model_data/skunk_model.npz`` when the registry is empty.
+"""
+
+import datetime
+import errno
+import json
+import os
+import shutil
+import tempfile
+
+REGISTRY_PATH = os.path.join(os.path.dirname(__file__), '..', 'model_data', 'registry')
+# version numbers to try when other runs keep taking the next one first
+SAVE_ATTEMPTS = 10
+
+
+class ModelRegistry:
+    """Numbered versions of named models under ``root``."""
+
+    def __init__(self, root=REGISTRY_PATH):
+        self.root = root
+
+    def versions(self, name):
+        """Version numbers saved for ``name``, oldest first."""
+        folder = os.path.join(self.root, name)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(i[1:]) for i in os.listdir(folder) if i.startswith('v') and i[1:].isdigit())
+
+    def path(self, name, version=None, filename=''):
+        """The folder of ``version`` (the newest if None), or a file in it; None if there is none."""
+        if version is None:
+            versions = self.versions(name)
+            if not versions:
+                return None
+            version = versions[-1]
+        return os.path.join(self.root, name, f'v{version}', filename)
+
+    def metadata(self, name, version=None):
+        path = self.path(name, version, 'metadata.json')
+        if path is None:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save(self, name, write, metadata):
+        """
+        Save a new version of ``name`` and return its number.
+
+        ``write(folder)`` puts the model's files in ``folder``; ``metadata`` is
+        stored next to them with the version and time added.  The version only
+        appears once everything is written.
+        """
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=os.path.join(self.root, name))
+        try:
+            write(staging)
+            for _ in range(SAVE_ATTEMPTS):
+                version = (self.versions(name) or [0])[-1] + 1
+                metadata = dict(metadata, name=name, version=version, created=datetime.datetime.now().isoformat(timespec='seconds'))
+                with open(os.path.join(staging, 'metadata.json'), 'w') as f:
+                    json.dump(metadata, f, indent=2)
+                    f.write('\n')
+                try:
+                    os.rename(staging, os.path.join(self.root, name, f'v{version}'))
+                    return version
+                except OSError as e:
+                    # another run took this number first; anything else
+                    # (permissions, a full disk) won't go away by retrying
+                    if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                        raise
+            raise FileExistsError(f'no free version of {name} after {SAVE_ATTEMPTS} attempts')
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
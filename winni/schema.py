@@ -0,0 +1,131 @@
+"""
+Compact in-memory layout of the fishing log.
+
+The log parses from CSV as text for every category, date and clock time and
+as 64-bit numbers for everything else.  ``compact`` converts it once per data
+version, when ``DatasetCache`` loads it, into:
+
+* categoricals for the text columns, with one vocabulary per column that is
+  carried over from the previous version (new values are added at the end),
+  so codes stay the same as the log grows and frames from different versions
+  concatenate without falling back to text,
+* ``int16`` for the whole-number columns and ``float32`` for measurements
+  (the log keeps one decimal, well within float32's seven digits), wind
+  speed included: it is noted in whole mph, but an entry of 7.5 must not
+  become 7,
+* ``int16`` minutes after midnight for ``time_caught``, ``lines_in`` and
+  ``lines_out``, ``NO_TIME`` for "no_time_recorded", and
+* ``datetime64`` dates at midnight.
+
+The frame is built once and shared by every session, so it must be treated
+as read-only.  ``expand`` turns the clock times back into "H:MM" and the
+dates into "YYYY-MM-DD" text for tables and downloads, and the float32
+measurements into the float64 numbers they were written as (63.1 rather than
+63.099998), so those read exactly like ``winni_reports.csv``.
+"""
+
+import numpy as np
+import pandas as pd
+
+from winni.cleaning import clock_minutes, parse_dates
+
+CATEGORY_COLUMNS = ['location', 'general_loc', 'weather', 'wind_dir', 'fish_type']
+INT_COLUMNS = ['year', 'month', 'hour']
+FLOAT_COLUMNS = ['air_temp_f', 'water_temp_f', 'wind_speed_mph', 'fish_length_in', 'water_depth_ft', 'duration_min']
+# written out as integers, the way the notebook records them, while every value is whole
+WHOLE_COLUMNS = ['wind_speed_mph']
+TIME_COLUMNS = ['time_caught', 'lines_in', 'lines_out']
+DATE_COLUMNS = ['date']
+BOOL_COLUMNS = ['skunked']
+
+NO_TIME = -1
+
+
+def _categorical(values, like):
+    """``values`` as a categorical whose categories start with ``like``'s, so its codes don't move."""
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Index(np.asarray(uniques).astype(str))
+    known = pd.Index([], dtype=object) if like is None else like.cat.categories
+    categories = known.append(uniques.difference(known).sort_values())
+    # missing values keep code -1
+    remap = np.append(categories.get_indexer(uniques), -1)
+    return pd.Series(pd.Categorical.from_codes(remap[codes], categories=categories), index=values.index)
+
+
+def _clock_text(minutes):
+    """"H:MM" for each distinct number of minutes, "no_time_recorded" for ``NO_TIME``."""
+    codes, uniques = pd.factorize(minutes)
+    text = ['no_time_recorded' if m == NO_TIME else f'{m // 60}:{m % 60:02d}' for m in uniques.tolist()]
+    return np.array(text, dtype=object)[codes]
+
+
+def _decimal(values):
+    """float32 ``values`` as float64, each the number its shortest decimal form stands for."""
+    codes, uniques = pd.factorize(values)
+    # str() of a float32 is its shortest round-tripping decimal
+    exact = np.array([float(str(value)) for value in uniques] + [np.nan])
+    return exact[codes]
+
+
+def whole_columns(df):
+    """The ``WHOLE_COLUMNS`` of ``df`` holding only whole numbers."""
+    whole = []
+    for col in WHOLE_COLUMNS:
+        if col in df:
+            values = df[col].to_numpy()
+            if np.array_equal(np.floor(values), values):
+                whole.append(col)
+    return whole
+
+
+def compact(df, like=None):
+    """
+    ``df`` in the compact layout.  ``like``, an earlier compacted version of
+    the log, supplies the category vocabularies to extend.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORY_COLUMNS:
+            previous = like[col] if like is not None and isinstance(like.dtypes.get(col), pd.CategoricalDtype) else None
+            values = _categorical(values, previous)
+        elif col in INT_COLUMNS:
+            values = values.astype(np.int16)
+        elif col in FLOAT_COLUMNS:
+            values = values.astype(np.float32)
+        elif col in TIME_COLUMNS and not pd.api.types.is_integer_dtype(values):
+            values = pd.Series(np.nan_to_num(clock_minutes(values), nan=NO_TIME).astype(np.int16), index=df.index)
+        elif col in DATE_COLUMNS:
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                # a typed snapshot already has datetimes
+                values = pd.Series(parse_dates(values), index=df.index)
+            values = values.dt.normalize()
+        elif col in BOOL_COLUMNS and values.dtype != bool:
+            values = values.astype(str).str.strip().str.lower().eq('true')
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def expand(df, whole=None):
+    """
+    ``df`` with the clock times and dates as text and the measurements as
+    float64 again, for showing or writing out.  ``whole`` names the columns
+    to give as integers; by default ``whole_columns(df)``, but exports pass
+    the whole table's so every chunk agrees.
+    """
+    whole = whole_columns(df) if whole is None else whole
+    texts = {}
+    for col in FLOAT_COLUMNS:
+        if col in df and df[col].dtype == np.float32:
+            values = df[col].to_numpy()
+            texts[col] = values.astype(np.int64) if col in whole else _decimal(values)
+    for col in TIME_COLUMNS:
+        if col in df and pd.api.types.is_integer_dtype(df[col]):
+            texts[col] = _clock_text(df[col].to_numpy())
+    for col in DATE_COLUMNS:
+        if col in df and pd.api.types.is_datetime64_any_dtype(df[col]):
+            days = df[col].to_numpy()
+            text = np.datetime_as_string(days, unit='D').astype(object)
+            text[np.isnat(days)] = np.nan
+            texts[col] = text
+    return df.assign(**texts) if texts else df
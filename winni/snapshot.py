@@ -0,0 +1,80 @@
+"""
+Typed columnar snapshots of the fishing log.
+
+The cleaning notebook writes the cleaned log once as an uncompressed Arrow IPC
+(Feather v2) file.  Loading it skips CSV parsing and type inference entirely:
+dates come back as datetime64, the text categories as pandas categoricals and
+``skunked`` as a real boolean.  Local files are memory mapped, and numeric
+columns are handed to pandas without copying where Arrow allows it.
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+DATE_COLUMNS = ['date']
+CATEGORY_COLUMNS = ['location', 'general_loc', 'weather', 'wind_dir', 'fish_type']
+BOOL_COLUMNS = ['skunked']
+
+
+def to_typed(df):
+    """Return a copy of ``df`` with the snapshot dtypes applied."""
+    df = df.copy()
+    for col in DATE_COLUMNS:
+        if col in df:
+            df[col] = pd.to_datetime(df[col])
+    for col in CATEGORY_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('category')
+    for col in BOOL_COLUMNS:
+        if col in df:
+            df[col] = df[col].replace({'True': True, 'False': False}).astype(bool)
+    return df
+
+
+def concat_typed(frames):
+    """
+    Stack frames that already have the snapshot dtypes.  Each category column
+    gets the union of the frames' categories first, so it stays categorical
+    instead of falling back to text.
+    """
+    frames = list(frames)
+    for col in CATEGORY_COLUMNS:
+        present = [df[col] for df in frames if col in df]
+        if len(present) < 2:
+            continue
+        categories = present[0].cat.categories
+        for values in present[1:]:
+            categories = categories.append(values.cat.categories.difference(categories))
+        frames = [df.assign(**{col: df[col].cat.set_categories(categories)}) if col in df else df for df in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_snapshot(df, path):
+    """Write ``df`` as a typed, uncompressed Arrow snapshot at ``path``."""
+    typed = to_typed(df).reset_index(drop=True)
+    # uncompressed so the file can be memory mapped instead of decoded
+    feather.write_feather(typed, path, compression='uncompressed')
+
+
+def snapshot_bytes(df):
+    """Same as ``write_snapshot`` but returns the file contents, for object stores."""
+    sink = pa.BufferOutputStream()
+    feather.write_feather(to_typed(df).reset_index(drop=True), sink, compression='uncompressed')
+    return sink.getvalue().to_pybytes()
+
+
+def read_snapshot(source, columns=None):
+    """
+    Load a snapshot from a path or from bytes already in memory.
+
+    ``columns`` limits the load to the columns a caller needs; the others are
+    never read from disk.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        table = feather.read_table(pa.BufferReader(source), columns=columns)
+    else:
+        table = feather.read_table(source, columns=columns, memory_map=True)
+    # split_blocks keeps one block per column so pandas doesn't consolidate
+    # (and copy) the numeric columns
+    return table.to_pandas(split_blocks=True)
@@ -0,0 +1,340 @@
+"""
+Cross-validated training for the notebooks' models.
+
+``classification_model.ipynb`` (the skunk classifier: ``PolynomialFeatures(2)``,
+``StandardScaler``, ``PCA(.95)``, AdaBoost over random forests) and
+``modeling_regression.ipynb`` (fish length from the one-hot log) were tuned by
+hand and pickled with no record of what they were trained on.
+``python -m winni.training`` does it as a script:
+
+* the feature matrix is encoded once (``FeaturePipeline``, then the
+  polynomial expansion for the classifier),
+* the scaler/PCA of each cross-validation fold is fitted once and the
+  transformed fold matrices are cached as ``.npy`` files, keyed by the data
+  hash, so every candidate, and the next run on the same data, reuses them,
+* every (candidate, fold) fit runs through ``joblib`` on all cores, from the
+  full grid (``--search grid``) or a random sample of it (``--search random``),
+* the best candidate is refitted on the training split, scored on a
+  held-out split and saved to the ``ModelRegistry`` with its metadata.
+
+Each search prints its wall-clock time and the peak memory of the process and
+its workers.  The app loads the newest skunk model from the registry.
+
+    python -m winni.training [--models skunk length] [--search random] [--n-iter 10] [--folds 5] [--jobs -1]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn import metrics as scores
+from sklearn.decomposition import PCA
+from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler, StratifiedKFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from winni import features, recommend
+from winni.features import FeaturePipeline
+from winni.registry import REGISTRY_PATH, ModelRegistry
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'model_data', 'winni_reports.arrow')
+FOLD_CACHE_PATH = os.path.join(REGISTRY_PATH, '.folds')
+
+
+def data_hash(df):
+    """Hash of the log's values and columns, stored with every model trained on it."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(json.dumps([[col, str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+
+class SkunkTask:
+    """The notebook's skunk classifier; saved as ``SkunkModel`` arrays."""
+
+    name = 'skunk'
+    scoring = 'roc_auc'
+    # the notebook's random forest grid
+    grid = {
+        'max_depth': [7, 11, 12, 13],
+        'max_features': [5, 6, 7, 8],
+        'min_samples_split': [2, 3, 4, 7, 9],
+        'n_estimators': [10, 13, 20, 23, 26, 30, 33],
+    }
+
+    def features(self, df):
+        pipeline = FeaturePipeline.from_frame(df, recommend.CATEGORY_COLUMNS, recommend.NUMERIC_COLUMNS)
+        X = recommend._poly2(pipeline.encode(df).astype(np.float64))
+        y = df['skunked'].astype(str).eq('True').astype(int).to_numpy()
+        return pipeline, X, y
+
+    def splitter(self, folds, random_state):
+        return StratifiedKFold(folds, shuffle=True, random_state=random_state)
+
+    def preprocess(self, X):
+        scaler = StandardScaler().fit(X)
+        pca = PCA(svd_solver='full', n_components=.95).fit(scaler.transform(X))
+        return scaler, pca
+
+    def transform(self, fitted, X):
+        scaler, pca = fitted
+        return pca.transform(scaler.transform(X))
+
+    def estimator(self, params, random_state):
+        # n_jobs=1: the search already keeps every core busy with whole fits
+        forest = RandomForestClassifier(random_state=random_state, n_jobs=1, **params)
+        return AdaBoostClassifier(forest, random_state=random_state)
+
+    def score(self, model, Z, y):
+        proba = model.predict_proba(Z)[:, 1]
+        predicted = (proba > 0.5).astype(int)
+        return {
+            'roc_auc': scores.roc_auc_score(y, proba),
+            'accuracy': scores.accuracy_score(y, predicted),
+            'precision': scores.precision_score(y, predicted, zero_division=0),
+            'recall': scores.recall_score(y, predicted, zero_division=0),
+        }
+
+    def save(self, folder, pipeline, fitted, model):
+        recommend.export_model(pipeline, *fitted, model, os.path.join(folder, 'model.npz'))
+
+
+class LengthTask:
+    """
+    The regression notebook's fish length model, as ridge regression (alpha
+    near 0 is its ``LinearRegression``); saved as plain coefficients.
+    """
+
+    name = 'fish_length'
+    scoring = 'r2'
+    grid = {'alpha': [0.001, 0.01, 0.1, 0.3, 1, 3, 10, 30, 100]}
+    numeric_columns = features.NUMERIC_COLUMNS + ['skunked']
+
+    def features(self, df):
+        pipeline = FeaturePipeline.from_frame(df, features.CATEGORY_COLUMNS, self.numeric_columns)
+        return pipeline, pipeline.encode(df).astype(np.float64), df['fish_length_in'].to_numpy(dtype=np.float64)
+
+    def splitter(self, folds, random_state):
+        return KFold(folds, shuffle=True, random_state=random_state)
+
+    def preprocess(self, X):
+        return StandardScaler().fit(X)
+
+    def transform(self, fitted, X):
+        return fitted.transform(X)
+
+    def estimator(self, params, random_state):
+        return Ridge(random_state=random_state, **params)
+
+    def score(self, model, Z, y):
+        predicted = model.predict(Z)
+        return {'r2': scores.r2_score(y, predicted), 'mse': scores.mean_squared_error(y, predicted)}
+
+    def save(self, folder, pipeline, fitted, model):
+        # Ridge(StandardScaler(x)) == x @ weights + bias
+        weights = model.coef_ / fitted.scale_
+        bias = model.intercept_ - fitted.mean_ @ weights
+        spec = {'numeric_columns': pipeline.numeric_columns, 'vocabulary': pipeline.vocabulary}
+        np.savez(os.path.join(folder, 'model.npz'), spec=np.array(json.dumps(spec)), weights=weights, bias=np.array(bias))
+
+
+class LengthModel:
+    """A saved ``LengthTask`` model, predicted with numpy only."""
+
+    def __init__(self, arrays):
+        spec = json.loads(str(arrays['spec']))
+        self.pipeline = FeaturePipeline(spec['vocabulary'], spec['numeric_columns'])
+        self.weights = arrays['weights']
+        self.bias = float(arrays['bias'])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def predict(self, df):
+        return self.pipeline.encode(df).astype(np.float64) @ self.weights + self.bias
+
+
+TASKS = {task.name: task for task in [SkunkTask(), LengthTask()]}
+
+
+def _tree_rss():
+    """Resident memory in bytes of this process and all of its descendants (Linux only)."""
+    parents = {}
+    for pid in os.listdir('/proc'):
+        if pid.isdigit():
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    # the command name is in parentheses and may hold spaces
+                    parents[int(pid)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    tree = {os.getpid()}
+    for _ in range(len(parents)):
+        grown = tree | {pid for pid, parent in parents.items() if parent in tree}
+        if grown == tree:
+            break
+        tree = grown
+
+    total = 0
+    for pid in tree:
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except OSError:
+            pass
+    return total
+
+
+class PeakMemory:
+    """Samples ``_tree_rss`` in a thread while in the ``with`` block; ``peak`` is in bytes."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while True:
+            try:
+                self.peak = max(self.peak, _tree_rss())
+            except OSError:
+                return
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def fold_matrices(task, X_train, y_train, folds, random_state, key, cache_dir=FOLD_CACHE_PATH):
+    """
+    ``[(Z_fit, y_fit, Z_val, y_val), ...]`` for every fold, transformed by a
+    preprocessing fitted on that fold's training rows.  Built once per data
+    hash and read back memory mapped afterwards.
+    """
+    folder = os.path.join(cache_dir, f'{task.name}-{key[:16]}-{folds}-{random_state}')
+    names = ['Z_fit', 'y_fit', 'Z_val', 'y_val']
+    if not os.path.isdir(folder):
+        os.makedirs(cache_dir, exist_ok=True)
+        staging = f'{folder}.{os.getpid()}'
+        os.makedirs(staging, exist_ok=True)
+        for i, (fit, val) in enumerate(task.splitter(folds, random_state).split(X_train, y_train)):
+            fitted = task.preprocess(X_train[fit])
+            arrays = [task.transform(fitted, X_train[fit]), y_train[fit], task.transform(fitted, X_train[val]), y_train[val]]
+            for name, array in zip(names, arrays):
+                np.save(os.path.join(staging, f'{i}_{name}.npy'), array)
+        try:
+            os.rename(staging, folder)
+        except OSError:
+            # another run cached the same folds first
+            shutil.rmtree(staging, ignore_errors=True)
+    return [
+        tuple(np.load(os.path.join(folder, f'{i}_{name}.npy'), mmap_mode='r') for name in names)
+        for i in range(folds)
+    ]
+
+
+def _fit_score(task, params, fold, random_state):
+    Z_fit, y_fit, Z_val, y_val = fold
+    model = task.estimator(params, random_state).fit(Z_fit, y_fit)
+    return task.score(model, Z_val, y_val)[task.scoring]
+
+
+def search(task, df, method='random', n_iter=10, folds=5, jobs=-1, random_state=42, cache_dir=FOLD_CACHE_PATH):
+    """
+    Cross-validate ``task``'s candidates on ``df`` and return the fitted
+    best model with its metadata.
+    """
+    key = data_hash(df)
+    pipeline, X, y = task.features(df)
+    stratify = y if task.scoring == 'roc_auc' else None
+    X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=random_state, stratify=stratify)
+
+    if method == 'grid':
+        candidates = list(ParameterGrid(task.grid))
+    else:
+        candidates = list(ParameterSampler(task.grid, n_iter=min(n_iter, len(ParameterGrid(task.grid))), random_state=random_state))
+
+    start = time.perf_counter()
+    with PeakMemory() as memory:
+        matrices = fold_matrices(task, X_train, y_train, folds, random_state, key, cache_dir)
+        results = joblib.Parallel(n_jobs=jobs)(
+            joblib.delayed(_fit_score)(task, params, fold, random_state)
+            for params in candidates for fold in matrices
+        )
+    seconds = time.perf_counter() - start
+
+    cv = np.array(results).reshape(len(candidates), folds)
+    best = int(np.nanargmax(cv.mean(axis=1)))
+    params = candidates[best]
+
+    fitted = task.preprocess(X_train)
+    model = task.estimator(params, random_state).fit(task.transform(fitted, X_train), y_train)
+    test = task.score(model, task.transform(fitted, X_test), y_test)
+
+    metadata = {
+        'data': {'hash': key, 'rows': len(df), 'train_rows': len(X_train), 'test_rows': len(X_test)},
+        'params': params,
+        'cv': {task.scoring: float(cv[best].mean()), f'{task.scoring}_std': float(cv[best].std()), 'folds': folds},
+        'test': {name: float(value) for name, value in test.items()},
+        'feature_columns': pipeline.columns,
+        'vocabulary': pipeline.vocabulary,
+        'search': {
+            'method': method,
+            'candidates': len(candidates),
+            'fits': len(results),
+            'jobs': joblib.effective_n_jobs(jobs),
+            'seconds': round(seconds, 2),
+            'peak_memory_mb': round(memory.peak / 2**20, 1),
+        },
+        'versions': {'sklearn': sklearn.__version__, 'numpy': np.__version__, 'pandas': pd.__version__},
+    }
+    return pipeline, fitted, model, metadata
+
+
+def main():
+    from winni.snapshot import read_snapshot
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--models', nargs='+', choices=list(TASKS), default=list(TASKS))
+    parser.add_argument('--search', choices=['random', 'grid'], default='random')
+    parser.add_argument('--n-iter', type=int, default=10, help='candidates sampled by --search random')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help='parallel fits, -1 for every core')
+    parser.add_argument('--data', default=DATA_PATH, help='.arrow snapshot of the cleaned log')
+    parser.add_argument('--registry', default=REGISTRY_PATH)
+    args = parser.parse_args()
+
+    df = read_snapshot(args.data)
+    registry = ModelRegistry(args.registry)
+    print(f"{'model':>12} {'candidates':>10} {'fits':>5} {'jobs':>4} {'seconds':>8} {'peak MB':>8} {'cv':>7} {'test':>7}  version")
+    for name in args.models:
+        task = TASKS[name]
+        pipeline, fitted, model, metadata = search(
+            task, df, args.search, args.n_iter, args.folds, args.jobs, cache_dir=os.path.join(args.registry, '.folds'))
+        version = registry.save(name, lambda folder: task.save(folder, pipeline, fitted, model), metadata)
+        run = metadata['search']
+        print(f"{name:>12} {run['candidates']:>10} {run['fits']:>5} {run['jobs']:>4} {run['seconds']:>8.1f} "
+              f"{run['peak_memory_mb']:>8.0f} {metadata['cv'][task.scoring]:>7.3f} {metadata['test'][task.scoring]:>7.3f}  "
+              f"{os.path.normpath(registry.path(name, version))}")
+        print(f"{'':>12} {task.scoring}, best {metadata['params']}")
+
+
+if __name__ == '__main__':
+    main()
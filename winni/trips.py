@@ -0,0 +1,120 @@
+"""
+Trip-level summary of the fishing log.
+
+The log has one row per fish (or one ``no_fish_caught`` row for a skunked
+trip), but every chart on "Show Me My Fish" and "Where Should I Fish?" is a
+rollup of trips: days fished per location, fish caught per location, records
+and skunks per month, records per fish type.  ``TripSummary`` keeps one row
+per trip -- a date and location, with the conditions the pages filter on --
+holding its record, fish and skunk counts and its records per fish type, so
+those rollups read a few rows per day fished instead of every fish.
+
+A trip whose fish were written down with different conditions (the wind
+picking up during the morning, say) gets one row per set of conditions, so
+filtering trips selects exactly the fish that filtering the log would.
+
+The log is append-only, so ``extend`` summarizes only the rows added since
+the summary was built and folds them into the existing trips, after checking
+(``winni.cache.RowDigest``) that the rows it was built from are still there.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from winni.cache import RowDigest
+
+# a trip, and the conditions the pages filter on
+TRIP_COLUMNS = ['date', 'location', 'weather', 'wind_dir', 'air_temp_f', 'wind_speed_mph']
+# the same for every fish on a trip (first recorded value kept)
+DETAIL_COLUMNS = ['year', 'month', 'general_loc', 'water_temp_f', 'duration_min']
+# records: rows in the log; fish: records with a fish; skunked: skunked records
+COUNT_COLUMNS = ['records', 'fish', 'skunked']
+
+
+def _trip_ids(frame):
+    return frame.groupby(TRIP_COLUMNS, dropna=False, sort=False, observed=True).ngroup().to_numpy()
+
+
+def _fold(table, types, trips):
+    """Combine the rows of ``table``/``types`` that ``trips`` numbers as the same trip."""
+    grouped = table.groupby(trips, sort=True)
+    # every row of a trip has the same key; details take the first one recorded.
+    # first() has no fast path for categoricals, so their codes are folded
+    # instead (missing as NaN, so it still skips them) and decoded after
+    columns = table[TRIP_COLUMNS + DETAIL_COLUMNS]
+    categories = {col: dtype for col, dtype in columns.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)}
+    columns = columns.assign(**{col: columns[col].cat.codes.where(columns[col].notna()) for col in categories})
+    folded = columns.groupby(trips, sort=True).first()
+    for col, dtype in categories.items():
+        folded[col] = pd.Categorical.from_codes(folded[col].fillna(-1).astype(int), dtype=dtype)
+    folded[COUNT_COLUMNS] = grouped[COUNT_COLUMNS].sum()
+    types = types.groupby(trips, sort=True).sum()
+    return folded.reset_index(drop=True), types.reset_index(drop=True)
+
+
+def _patched(frame, rows, folded):
+    """
+    ``frame`` with ``rows`` replaced by the first rows of ``folded`` (the
+    touched trips, in the same order) and the rest of ``folded`` appended.
+    """
+    patched = pd.concat([frame, folded.iloc[len(rows):]], ignore_index=True)
+    for j, col in enumerate(patched.columns):
+        # a trip's key never changes, only its details and counts
+        if col not in TRIP_COLUMNS:
+            patched.iloc[rows, j] = folded[col].to_numpy()[:len(rows)]
+    return patched
+
+
+class TripSummary:
+    """
+    One row per trip (``table``) and its records per fish type (``types``,
+    aligned with ``table``), for one version of the log.
+    """
+
+    def __init__(self, df):
+        self.count = len(df)
+        self.digest = RowDigest(df)
+        self.table, self.types = self._summarize(df)
+
+    @staticmethod
+    def _summarize(df):
+        rows = df[TRIP_COLUMNS + DETAIL_COLUMNS].assign(
+            records=1,
+            fish=(df['fish_type'] != 'no_fish_caught').to_numpy(dtype=np.int64),
+            skunked=df['skunked'].to_numpy(dtype=np.int64),
+        )
+        types = pd.get_dummies(df['fish_type'].to_numpy(), dtype=np.int64)
+        return _fold(rows.reset_index(drop=True), types, _trip_ids(rows))
+
+    def extend(self, df):
+        """
+        Return the summary for ``df``, a later version of the same append-only
+        log.  Falls back to a full rebuild if rows were removed or changed.
+        """
+        digest = self.digest.extend(df)
+        if digest is None:
+            return TripSummary(df)
+        if len(df) == self.count:
+            return self
+
+        new, new_types = self._summarize(df.iloc[self.count:])
+        # only trips on the appended rows' dates can gain records; they are
+        # folded with the new rows and everything else is copied as is
+        touched = np.flatnonzero(self.table['date'].isin(new['date']).to_numpy())
+        table = pd.concat([self.table.iloc[touched], new], ignore_index=True)
+        types = pd.concat([self.types.iloc[touched], new_types], ignore_index=True).fillna(0).astype(np.int64)
+        folded, folded_types = _fold(table, types, _trip_ids(table))
+
+        # a new object, since other sessions may still be reading this one
+        updated = copy.copy(self)
+        updated.table = _patched(self.table, touched, folded)
+        columns = self.types.columns.union(new_types.columns)
+        updated.types = _patched(self.types.reindex(columns=columns, fill_value=0), touched, folded_types[columns])
+        updated.count = len(df)
+        updated.digest = digest
+        return updated
+
+    def __len__(self):
+        return len(self.table)
@@ -0,0 +1,119 @@
+"""
+One writer per process for records added to the fishing log.
+
+Every "Add Fish" session hands its records to the process's
+``WriteCoordinator`` instead of writing them itself.  A single worker thread
+takes them off a queue, waits ``window`` seconds for more to arrive, and
+writes everything it collected as one append segment, so people submitting
+at the same moment cost one upload between them and never write over each
+other.  Each caller gets a future that resolves to the segment its records
+went into, once that segment is stored.
+
+Across processes (several app instances on one bucket) the storage's
+generation preconditions keep writes from clobbering each other; see
+``winni.storage``.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+from winni import metrics
+from winni.storage import Conflict
+
+_STOP = object()
+
+
+class WriteCoordinator:
+    """Queues records for a ``FishLog`` and appends them in batches from one thread."""
+
+    def __init__(self, fish_log, window=0.05, max_batch=1000, retries=3):
+        self.fish_log = fish_log
+        self.window = window
+        self.max_batch = max_batch
+        self.retries = retries
+        self.batches = 0
+        self.records = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, records):
+        """
+        Queue ``records`` (a DataFrame or list of dicts) for the next batch.
+        Returns a future for the name of the segment they are written in.
+        """
+        new = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        future = Future()
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='winni-writer', daemon=True)
+                self._worker.start()
+        self._queue.put((new, future))
+        return future
+
+    def append(self, records, timeout=30):
+        """``submit`` and wait until the records are stored."""
+        return self.submit(records).result(timeout)
+
+    def close(self):
+        """Write whatever is queued and stop the worker."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(_STOP)
+            worker.join()
+
+    def _collect(self):
+        """The next batch of ``(records, future)``, and whether to stop after it."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch, rows = [first], len(first[0])
+        deadline = time.monotonic() + self.window
+        while rows < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            rows += len(item[0])
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        # lined up by column name, in case submitters' columns come in a different order
+        records = pd.concat([records for records, _ in batch], ignore_index=True)
+        for attempt in range(self.retries + 1):
+            try:
+                with metrics.span('writes.batch'):
+                    segment = self.fish_log.append(records)
+                break
+            except Conflict as e:
+                # a segment name already taken; try again under a new one
+                if attempt == self.retries:
+                    for _, future in batch:
+                        future.set_exception(e)
+                    return
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+
+        self.batches += 1
+        self.records += len(records)
+        metrics.count('writes.batches')
+        metrics.count('writes.records', len(records))
+        for _, future in batch:
+            future.set_result(segment)